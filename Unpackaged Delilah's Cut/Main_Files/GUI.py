@@ -17,20 +17,42 @@ from PyQt6.QtWidgets import (
     QTextEdit,
     QScrollArea,
     QMessageBox,
+    QTableView,
+    QHeaderView,
+    QAbstractItemView,
+    QSplitter,
+    QProgressBar,
 )
 from PyQt6.QtGui import QIcon, QPixmap, QFont, QColor, QPalette
 
 # Basic Library Imports
 import sys
 import os
-import markdown
 import json
+import threading
+import time
+from functools import lru_cache
 
 # Other File imports
-from Main_Files.processing import MRNA
-from Main_Files.exclusion_and_scoring import *
-from Main_Files.PDFresults import *
+# The pipeline (numpy, the folding server), reportlab and markdown are imported the first time they are needed,
+# so the window shows without waiting on them (see startupBudget.py)
 import Main_Files.settings as settings
+from Main_Files.resultsModel import ResultsTableModel, reportHtml
+
+# What the loading screen says for each stage of a run (see RunContext.progress)
+STAGE_TEXT = {
+    "parse": "Reading the sequence",
+    "mRNAFold": "Folding the mRNA",
+    "windows": "Making siRNA windows",
+    "folding": "Folding siRNAs",
+    "exclusion": "Excluding siRNAs",
+    "scoring": "Scoring siRNAs",
+    "reporting": "Writing the reports",
+}
+# Seconds between progress signals of the same stage, so the window isn't flooded with them
+PROGRESS_INTERVAL = 0.1
+# Seconds between provisional top N signals, each one rebuilds the loading screen's table
+PROVISIONAL_INTERVAL = 0.5
 
 
 def resource_path(relative_path):
@@ -40,13 +62,104 @@ def resource_path(relative_path):
     return os.path.join(os.path.abspath("."), relative_path)
 
 
+@lru_cache(maxsize=None)
+def renderMarkdown(relative_path):
+    # Markdown pages are converted to HTML once, the first time they are shown
+    import markdown
+
+    with open(resource_path(relative_path), "r", encoding="utf-8") as file:
+        return markdown.markdown(file.read())
+
+
+class LazyStackedWidget(QStackedWidget):
+    # Calls buildScreen(index) before any screen is shown, so screens can be built the first time they are needed
+    def __init__(self, buildScreen):
+        super().__init__()
+        self.buildScreen = buildScreen
+
+    def setCurrentIndex(self, index):
+        self.buildScreen(index)
+        super().setCurrentIndex(index)
+
+    def setCurrentWidget(self, widget):
+        self.setCurrentIndex(self.indexOf(widget))
+
+
 class BackendThread(QThread):
     backend_finished = pyqtSignal()  # Signal to notify when backend is done
+    backend_cancelled = pyqtSignal()  # The run was cancelled (see cancel) and has stopped
+    # Stage of the run, siRNA windows done and in total, -1 when the stage has no count (see RunContext.progress)
+    progress = pyqtSignal(str, int, int)
+    # Top siRNA Objects of the windows scored so far, with the siRNA windows scored and in total (see RunContext.provisional)
+    provisional = pyqtSignal(list, int, int)
+
+    def __init__(self):
+        super().__init__()
+        # Set to stop the run, cleared by the window before each run
+        self.cancelled = threading.Event()
+        self.lastProgress = None
+        self.lastProvisional = None
+        # Set by the window once it starts folding ahead of the run (see MainWindow.startSpeculativeFolding)
+        self.speculativeFolder = None
+        # Keeps the folds and features of the last run, so reruns of the same sequence only re-score (see designSession.py)
+        self.session = None
 
     def run(self):
-        runBackend()  # This is your backend function
+        from Main_Files.designSession import DesignSession
+        from Main_Files.runContext import RunContext, RunCancelled
+
+        # Whole run from the settings collected by the GUI, same pipeline as the command line (see pipeline.runDesign)
+        # The run works on its own copy of the settings, its results are kept here for the window to show
+        context = RunContext.fromSettings()
+        context.onProgress = self.reportProgress
+        context.onProvisional = self.reportProvisional
+        context.cancelled = self.cancelled
+        self.lastProgress = None
+        self.lastProvisional = None
+        try:
+            # Folds already made in the background for the same sequence and lengths are used instead of folding again
+            prepared = None
+            if self.speculativeFolder is not None:
+                prepared = self.speculativeFolder.take(context)
+            context.checkCancelled()
+            if self.session is None:
+                self.session = DesignSession()
+            self.topRNAs, self.reports = self.session.run(context, prepared)
+        except RunCancelled:
+            self.backend_cancelled.emit()
+            return
+        self.context = context
         self.backend_finished.emit()  # Emit signal when done
 
+    def reportProgress(self, stage, done, total):
+        # Called on the run's thread, a stage that goes on only signals every PROGRESS_INTERVAL seconds
+        now = time.monotonic()
+        if self.lastProgress is not None:
+            lastStage, lastTime = self.lastProgress
+            if stage == lastStage and now - lastTime < PROGRESS_INTERVAL:
+                return
+        self.lastProgress = (stage, now)
+        self.progress.emit(
+            stage, -1 if done is None else done, -1 if total is None else total
+        )
+
+    def reportProvisional(self, selector, done, total):
+        # Called on the run's thread, the siRNA Objects are made here so the window gets a list the run no longer changes
+        now = time.monotonic()
+        if self.lastProvisional is not None and now - self.lastProvisional < PROVISIONAL_INTERVAL:
+            return
+        self.lastProvisional = now
+        self.provisional.emit(selector.rnaObjs(), done, total)
+
+    def cancel(self):
+        # The run stops at its next check, and its folding server is stopped if it is still busy with the run's folds
+        from Main_Files.processing import getFoldingServers
+
+        self.cancelled.set()
+        if self.speculativeFolder is not None:
+            self.speculativeFolder.cancel()
+        getFoldingServers().cancel(self.cancelled)
+
 
 class MainWindow(QMainWindow):
     def __init__(self, basicNeedsDict, exclusionAndScoringDict):
@@ -63,20 +176,19 @@ class MainWindow(QMainWindow):
 
         self.setupPalette()
         # Stacked Widget to manage different screens
-        self.stackedWidget = QStackedWidget()
+        self.stackedWidget = LazyStackedWidget(self.buildScreen)
 
-        # Create screens
+        # Create screens, only the start up screen is built now, the others hold a placeholder until first shown
         self.startUpWidget = self.createStartUpWidget()
-        self.homeWidget = self.createHomeWidget()
-        self.infoWidget = self.createInfoWidget()
-        self.usageWidget = self.createUsageWidget()
-        self.settingsScreen1 = self.createSettingsScreen1()
-
         self.stackedWidget.addWidget(self.startUpWidget)  # index 0
-        self.stackedWidget.addWidget(self.homeWidget)  # index 1
-        self.stackedWidget.addWidget(self.infoWidget)  # index 2
-        self.stackedWidget.addWidget(self.usageWidget)  # index 3
-        self.stackedWidget.addWidget(self.settingsScreen1)  # index 4
+        self.lazyScreens = {
+            1: ("homeWidget", self.createHomeWidget),
+            2: ("infoWidget", self.createInfoWidget),
+            3: ("usageWidget", self.createUsageWidget),
+            4: ("settingsScreen1", self.createSettingsScreen1),
+        }
+        for index in sorted(self.lazyScreens):
+            self.stackedWidget.addWidget(QWidget())  # index 1 to 4
 
         # Set central widget
         self.setCentralWidget(self.stackedWidget)
@@ -84,6 +196,36 @@ class MainWindow(QMainWindow):
         # Backend thread setup
         self.backend_thread = BackendThread()
         self.backend_thread.backend_finished.connect(self.on_backend_finished)
+        self.backend_thread.backend_cancelled.connect(self.on_backend_cancelled)
+        self.backend_thread.progress.connect(self.on_backend_progress)
+        self.backend_thread.provisional.connect(self.on_backend_provisional)
+
+        # Background folding of the sequence being entered, started once the input has been still for a moment
+        self.speculativeFolder = None
+        self.speculationTimer = QTimer(self)
+        self.speculationTimer.setSingleShot(True)
+        self.speculationTimer.timeout.connect(self.startSpeculativeFolding)
+
+    def buildScreen(self, index):
+        if index not in self.lazyScreens:
+            return
+        name, createScreen = self.lazyScreens.pop(index)
+        screen = createScreen()
+        setattr(self, name, screen)
+
+        placeholder = self.stackedWidget.widget(index)
+        self.stackedWidget.insertWidget(index, screen)
+        self.stackedWidget.removeWidget(placeholder)
+        placeholder.deleteLater()
+
+    def replaceScreen(self, name, screen):
+        # Screens made again when the user reruns replace the old one instead of piling up on the stack
+        old = getattr(self, name, None)
+        if old is not None:
+            self.stackedWidget.removeWidget(old)
+            old.deleteLater()
+        setattr(self, name, screen)
+        self.stackedWidget.addWidget(screen)
 
     def setupPalette(self):
         dark_color = QColor(33, 33, 33)  # Background and base color
@@ -157,18 +299,89 @@ class MainWindow(QMainWindow):
             QScrollArea {{
                 border: none;
             }}
+            QTableView {{
+                background-color: #333333;
+                alternate-background-color: #2B2B2B;
+                color: #F5EFE5;
+                gridline-color: #4D4D4D;
+                border: 1px solid #FAD7A0;
+                border-radius: 5px;
+            }}
+            QProgressBar {{
+                background-color: #333333;
+                color: #F5EFE5;
+                border: 1px solid #FAD7A0;
+                border-radius: 5px;
+                text-align: center;
+            }}
+            QProgressBar::chunk {{
+                background-color: {checked_color.name()};
+                border-radius: 5px;
+            }}
+            QHeaderView::section {{
+                background-color: {dark_color.name()};
+                color: #FAD7A0;
+                border: 1px solid #4D4D4D;
+                padding: 4px;
+            }}
             """
         )
 
     @pyqtSlot()
     def on_backend_finished(self):
+        self.resultsReport = self.backend_thread.reports
+        self.resultsRNAs = self.backend_thread.topRNAs
+        self.resultsSensitivity = self.backend_thread.context.sensitivity
         # Generate the results screen and add it to the stacked widget
         self.createAndShowResultsScreen()
         self.stackedWidget.setCurrentIndex(
             self.stackedWidget.count() - 1
         )  # Go to results screen
 
+    @pyqtSlot(str, int, int)
+    def on_backend_progress(self, stage, done, total):
+        text = STAGE_TEXT.get(stage, stage)
+        if total > 0:
+            text += f" ({done:,} of {total:,} siRNA windows)"
+            self.progressBar.setRange(0, total)
+            self.progressBar.setValue(done)
+        else:
+            # No count for this stage, the bar just shows that the run is busy
+            self.progressBar.setRange(0, 0)
+        self.progressLabel.setText(text)
+
+    @pyqtSlot(list, int, int)
+    def on_backend_provisional(self, siRNAs, done, total):
+        # Replaced by the results screen once the run completes
+        self.provisionalModel.setSiRNAs(siRNAs)
+        self.provisionalLabel.setText(
+            f"PROVISIONAL top {len(siRNAs)} of the first {done:,} of {total:,} siRNA windows, "
+            "the ranking can still change until the run completes"
+        )
+        self.provisionalLabel.show()
+        self.provisionalTable.show()
+
+    @pyqtSlot()
+    def on_backend_cancelled(self):
+        # Back to the settings, the entered sequence and run name stay filled in
+        self.stackedWidget.setCurrentIndex(4)
+
+    def cancelBackend(self):
+        self.cancelButton.setEnabled(False)
+        self.cancelButton.setText("Cancelling...")
+        self.backend_thread.cancel()
+
     def beginBackend(self):
+        # A background fold still waiting to start would only compete with the run for the folding server
+        self.speculationTimer.stop()
+        self.backend_thread.cancelled.clear()
+        self.progressLabel.setText("Starting the run...")
+        self.progressBar.setRange(0, 0)
+        self.cancelButton.setEnabled(True)
+        self.cancelButton.setText("Cancel Run")
+        self.provisionalModel.setSiRNAs([])
+        self.provisionalLabel.hide()
+        self.provisionalTable.hide()
         self.backend_thread.start()  # Start the backend thread
 
     def updateSettingsDicts(self):
@@ -177,6 +390,22 @@ class MainWindow(QMainWindow):
         settings.sequence_dict = self.sequence_dict
         settings.exclusionAndScoringDict = self.exclusionAndScoringDict
 
+    def createResultsTable(self, model):
+        table = QTableView()
+        table.setModel(model)
+        table.setFont(QFont("Arial", 13))
+        table.setAlternatingRowColors(True)
+        table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        table.verticalHeader().setVisible(False)
+        # Fixed row heights and header sized columns, so nothing is measured row by row
+        table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        table.setSortingEnabled(True)
+        table.sortByColumn(0, Qt.SortOrder.AscendingOrder)
+        return table
+
     def createAndShowResultsScreen(self):
         # Create the main widget and layout
         main_widget = QWidget()
@@ -185,49 +414,45 @@ class MainWindow(QMainWindow):
         main_layout.setSpacing(20)
         main_widget.setLayout(main_layout)
 
-        # Create a scroll area
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setStyleSheet("border: none;")
-
-        # Create the content widget for the scroll area
-        content_widget = QWidget()
-        content_layout = QVBoxLayout()
-        content_layout.setContentsMargins(10, 10, 10, 10)
-        content_layout.setSpacing(15)
-        content_widget.setLayout(content_layout)
-
         # Key information labels
         info_label = QLabel("Results of Analysis")
         info_label.setFont(QFont("Arial", 28, QFont.Weight.Bold))
         info_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         info_label.setStyleSheet("color: #FFFFFF;")
-        content_layout.addWidget(info_label)
-
-        # Display the reports
-        reports = resultsReport
-
-        for report in reports:
-            for line in report:
-                report_label = QLabel(line)
-                report_label.setFont(QFont("Arial", 14))
-                report_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
-                report_label.setWordWrap(True)
-                # Apply color coding based on line content
-                if "positive" in line.lower():
-                    report_label.setStyleSheet("color: #4CAF50;")  # Green for positive
-                elif "negative" in line.lower():
-                    report_label.setStyleSheet("color: #F44336;")  # Red for negative
-                else:
-                    report_label.setStyleSheet("color: #FFFFFF;")  # White for neutral
+        main_layout.addWidget(info_label)
 
-                content_layout.addWidget(report_label)
+        hint_label = QLabel(
+            "Click a column to sort by it, pick an siRNA to see its full report below"
+        )
+        hint_label.setFont(QFont("Arial", 14))
+        hint_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        main_layout.addWidget(hint_label)
+
+        # One row per siRNA, the table only builds the rows in view (see resultsModel.py)
+        self.resultsModel = ResultsTableModel(
+            self.resultsRNAs, self.resultsSensitivity, main_widget
+        )
+        results_table = self.createResultsTable(self.resultsModel)
+
+        # Run overview until an siRNA is picked, then that siRNA's report
+        self.resultsDetails = QTextEdit()
+        self.resultsDetails.setReadOnly(True)
+        self.resultsDetails.setFont(QFont("Arial", 14))
+        results_table.selectionModel().currentRowChanged.connect(
+            lambda current, previous: self.showResultDetails(current.row())
+        )
+        self.showResultDetails(-1)
 
-        # Set the content widget to the scroll area
-        scroll_area.setWidget(content_widget)
+        overview_button = QPushButton("Show Run Overview")
+        overview_button.setFont(QFont("Arial", 14))
+        overview_button.clicked.connect(lambda: self.showResultsOverview(results_table))
+        main_layout.addWidget(overview_button, alignment=Qt.AlignmentFlag.AlignRight)
 
-        # Add the scroll area to the main layout with stretch
-        main_layout.addWidget(scroll_area, stretch=9)
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        splitter.addWidget(results_table)
+        splitter.addWidget(self.resultsDetails)
+        splitter.setSizes([500, 300])
+        main_layout.addWidget(splitter, stretch=9)
 
         # Create a horizontal layout for the buttons at the bottom
         button_layout = QHBoxLayout()
@@ -252,6 +477,26 @@ class MainWindow(QMainWindow):
         exit_button.clicked.connect(QApplication.instance().quit)
         button_layout.addWidget(exit_button, alignment=Qt.AlignmentFlag.AlignLeft)
 
+        # Add Change Settings button, reruns of the same sequence reuse this run's folds and only re-score
+        rerun_button = QPushButton("Change Settings and Rerun")
+        rerun_button.setFont(QFont("Arial", 18, QFont.Weight.Bold))
+        rerun_button.setStyleSheet(
+            """
+            QPushButton {
+                background-color: #FAD7A0;
+                color: #333333;
+                border: 2px solid #333333;
+                border-radius: 10px;
+                padding: 10px;
+            }
+            QPushButton:hover {
+                background-color: #FFC107;
+            }
+            """
+        )
+        rerun_button.clicked.connect(lambda: self.stackedWidget.setCurrentIndex(4))
+        button_layout.addWidget(rerun_button, alignment=Qt.AlignmentFlag.AlignCenter)
+
         # Add Save as PDF button
         save_button = QPushButton("Save as PDF")
         save_button.setFont(QFont("Arial", 18, QFont.Weight.Bold))
@@ -277,13 +522,28 @@ class MainWindow(QMainWindow):
         main_layout.addLayout(button_layout, stretch=1)
 
         # Add the results screen to the stacked widget
-        self.stackedWidget.addWidget(main_widget)
+        self.replaceScreen("resultsScreen", main_widget)
         self.stackedWidget.setCurrentWidget(main_widget)
 
+    def showResultsOverview(self, table):
+        table.selectionModel().clear()
+        self.showResultDetails(-1)
+
+    def showResultDetails(self, row):
+        # Reports are the overview, one per siRNA best first, then any others (see pipeline.finishDesign)
+        siRNACount = len(self.resultsRNAs)
+        if row < 0:
+            reports = [self.resultsReport[0]] + self.resultsReport[1 + siRNACount :]
+        else:
+            reports = [self.resultsReport[1 + self.resultsModel.rankAt(row)]]
+        self.resultsDetails.setHtml(reportHtml(reports))
+
     def savePdfAndDisableButton(self, button):
         # Generate the PDF
+        from Main_Files.PDFresults import generate_results_pdf
+
         pdf_name = settings.basicNeedsDict["OutputFileName"] + ".pdf"
-        generate_results_pdf(resultsReport, pdf_name)
+        generate_results_pdf(self.resultsReport, pdf_name)
 
         # Update the button text and disable it
         button.setText("Saved to 'PDF_Outputs' Folder")
@@ -321,7 +581,9 @@ class MainWindow(QMainWindow):
         animation_label.setStyleSheet("color: #F5EFE5;")
         layout.addWidget(animation_label)
 
-        # Timer for updating the spinner animation
+        # Timer for updating the spinner animation, the one of an earlier loading screen is stopped
+        if hasattr(self, "animation_timer"):
+            self.animation_timer.stop()
         self.animation_index = 0
         self.animation_timer = QTimer(self)
         self.animation_timer.timeout.connect(
@@ -329,6 +591,37 @@ class MainWindow(QMainWindow):
         )
         self.animation_timer.start(200)  # Change the spinner every 200ms
 
+        # Stage of the run and how far it got (see on_backend_progress)
+        self.progressLabel = QLabel("Starting the run...")
+        self.progressLabel.setFont(QFont("Arial", 18))
+        self.progressLabel.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self.progressLabel)
+
+        self.progressBar = QProgressBar()
+        self.progressBar.setRange(0, 0)
+        self.progressBar.setFixedHeight(24)
+        layout.addWidget(self.progressBar)
+
+        # Stops the run and its folding, so the settings can be changed without closing the program
+        self.cancelButton = QPushButton("Cancel Run")
+        self.cancelButton.setFont(QFont("Arial", 18, QFont.Weight.Bold))
+        self.cancelButton.clicked.connect(self.cancelBackend)
+        layout.addWidget(self.cancelButton, alignment=Qt.AlignmentFlag.AlignCenter)
+
+        # Top N of the windows scored so far, shown from the first update of a long run (see on_backend_provisional)
+        self.provisionalLabel = QLabel()
+        self.provisionalLabel.setFont(QFont("Arial", 16, QFont.Weight.Bold))
+        self.provisionalLabel.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.provisionalLabel.setWordWrap(True)
+        self.provisionalLabel.setStyleSheet("color: #FFC107;")
+        self.provisionalLabel.hide()
+        layout.addWidget(self.provisionalLabel)
+
+        self.provisionalModel = ResultsTableModel([], parent=widget)
+        self.provisionalTable = self.createResultsTable(self.provisionalModel)
+        self.provisionalTable.hide()
+        layout.addWidget(self.provisionalTable, stretch=1)
+
         return widget
 
     def updateAnimation(self, label):
@@ -340,23 +633,11 @@ class MainWindow(QMainWindow):
         # Process the cDNA vs mRNA choice again if needed
         self.basicNeedsDict["cDNA(T)/mRNA(F)"] = self.cDNAOptionInput.isChecked()
 
-        # Retrieve the sequence and file name from input
-        if self.basicNeedsDict["textFile(T)/CopyPasted(F)"] == False:
-            sequence = self.sequenceInput.toPlainText()
-            file_name = None
-        else:
-            sequence = None
-            file_name = self.sequenceInputFileName.text().strip().lower()
-
         saveFileName = self.fileNameInput.text().strip()
         self.basicNeedsDict["OutputFileName"] = saveFileName
 
         # Create a dictionary to pass these values to the backend
-        self.sequence_dict = {
-            "sequence": sequence,
-            "file_name": file_name,
-            "RNAObjs": [],
-        }
+        self.sequence_dict = self.enteredSequenceDict()
         # Send to backend
         self.updateSettingsDicts()
 
@@ -369,6 +650,47 @@ class MainWindow(QMainWindow):
         else:
             self.showSequenceErrors(ErrorMessages)
 
+    def enteredSequenceDict(self):
+        # Retrieve the sequence and file name from input
+        if self.basicNeedsDict["textFile(T)/CopyPasted(F)"] == False:
+            sequence = self.sequenceInput.toPlainText()
+            file_name = None
+        else:
+            sequence = None
+            file_name = self.sequenceInputFileName.text().strip().lower()
+        return {"sequence": sequence, "file_name": file_name, "RNAObjs": []}
+
+    def scheduleSpeculativeFolding(self):
+        # Every edit restarts the wait, so folding isn't restarted on every key press
+        self.speculationTimer.start(800)
+
+    def startSpeculativeFolding(self):
+        # Folds the entered sequence in the background, restarting if it changed (see prefolding.py)
+        from Main_Files.prefolding import SpeculativeFolder, foldKey
+        from Main_Files.runContext import RunContext
+
+        # The run folds for itself or takes the job it was begun with, a new job now would fold again for nothing
+        if self.backend_thread.isRunning():
+            return
+        if self.speculativeFolder is None:
+            self.speculativeFolder = SpeculativeFolder()
+            self.backend_thread.speculativeFolder = self.speculativeFolder
+
+        context = RunContext.fromSettings()
+        context.basicNeedsDict.update(self.basicNeedsDict)
+        context.sequence_dict = self.enteredSequenceDict()
+        file_name = context.sequence_dict["file_name"]
+        if file_name is not None and not os.path.isfile(get_input_file_path(file_name)):
+            self.speculativeFolder.cancel()
+            return
+        # A rerun of the last run's sequence already has its folds in the session
+        session = self.backend_thread.session
+        if session is not None and session.prepared is not None:
+            if session.prepared.key == foldKey(context):
+                self.speculativeFolder.cancel()
+                return
+        self.speculativeFolder.start(context)
+
     def showSequenceErrors(self, errorMessages):
         # Create a list to store multiple error labels
         if not hasattr(self, "sequence_error_labels"):
@@ -516,6 +838,14 @@ class MainWindow(QMainWindow):
         layout.addWidget(instructions_label)
 
         layout.addWidget(sequence_widget)
+        # Folding starts in the background as soon as a sequence is entered, or right away for a rerun's sequence
+        if not self.basicNeedsDict["textFile(T)/CopyPasted(F)"]:
+            self.sequenceInput.textChanged.connect(self.scheduleSpeculativeFolding)
+        else:
+            self.sequenceInputFileName.textChanged.connect(
+                self.scheduleSpeculativeFolding
+            )
+        self.scheduleSpeculativeFolding()
 
         # cDNA or mRNA Checkbox
         self.cDNAOptionInput = QCheckBox("Is this sequence cDNA? (Unchecked = mRNA)")
@@ -547,6 +877,8 @@ class MainWindow(QMainWindow):
         self.fileNameInput.setPlaceholderText(
             "Enter Run Title Here (Exclude spaces, periods, commas, quotes)"
         )
+        if self.basicNeedsDict["OutputFileName"]:
+            self.fileNameInput.setText(self.basicNeedsDict["OutputFileName"])
         self.fileNameInput.setFont(QFont("Arial", 14))
         self.fileNameInput.setStyleSheet(
             "background-color: #333333; color: #F5EFE5; border: 1px solid #FAD7A0; border-radius: 5px;"
@@ -597,6 +929,9 @@ class MainWindow(QMainWindow):
 
         self.sequenceInput = QTextEdit()
         self.sequenceInput.setPlaceholderText("Enter your sequence here")
+        # A rerun starts from the sequence of the last run
+        if getattr(self, "sequence_dict", {}).get("sequence"):
+            self.sequenceInput.setPlainText(self.sequence_dict["sequence"])
         self.sequenceInput.setFixedHeight(150)
         self.sequenceInput.setFont(QFont("Arial", 14))
         self.sequenceInput.setStyleSheet(
@@ -614,6 +949,8 @@ class MainWindow(QMainWindow):
         widget.setLayout(layout)
 
         self.sequenceInputFileName = QLineEdit()
+        if getattr(self, "sequence_dict", {}).get("file_name"):
+            self.sequenceInputFileName.setText(self.sequence_dict["file_name"])
         self.sequenceInputFileName.setPlaceholderText(
             "Enter the file name of your sequence."
         )
@@ -631,6 +968,7 @@ class MainWindow(QMainWindow):
 
     def togglecDNAOptionInput(self):
         self.basicNeedsDict["cDNA(T)/mRNA(F)"] = self.cDNAOptionInput.isChecked()
+        self.scheduleSpeculativeFolding()
 
     def showNextSettingsScreen(self):
         next_index = self.stackedWidget.currentIndex() + 1
@@ -650,10 +988,9 @@ class MainWindow(QMainWindow):
                 if param["propName"] == key:
                     param["exclusionary"] = checkbox.isChecked()
 
-        self.settingsScreen3 = self.createSettingsScreen3()
-        self.stackedWidget.addWidget(self.settingsScreen3)  # index 6
+        self.replaceScreen("settingsScreen3", self.createSettingsScreen3())
 
-        self.stackedWidget.setCurrentIndex(6)
+        self.stackedWidget.setCurrentWidget(self.settingsScreen3)
 
     def processAndGoToNextSettingsScreen3(self):
         # Update the score values in the dict and complete the settings process
@@ -662,16 +999,14 @@ class MainWindow(QMainWindow):
                 if param["propName"] == key:
                     param["scoreVal"] = slider.value()
 
-        # Create and add the sequence input screen dynamically at index 7
-        self.sequenceInputScreen = self.createSequenceInputScreen()
-        self.stackedWidget.addWidget(self.sequenceInputScreen)  # index 7
+        # Create and add the sequence input screen dynamically
+        self.replaceScreen("sequenceInputScreen", self.createSequenceInputScreen())
 
-        # Create loading Screen and at at index 8
-        self.loadingScreen = self.createLoadingScreen()
-        self.stackedWidget.addWidget(self.loadingScreen)  # index 6
+        # Create loading Screen
+        self.replaceScreen("loadingScreen", self.createLoadingScreen())
 
         # Navigate to the sequence input screen
-        self.stackedWidget.setCurrentIndex(7)
+        self.stackedWidget.setCurrentWidget(self.sequenceInputScreen)
 
     def createSettingsScreen3(self):
         scroll_area = QScrollArea()
@@ -1321,6 +1656,7 @@ class MainWindow(QMainWindow):
                     self.exclusionAndScoringDict = data.get(
                         "exclusionAndScoringDict", []
                     )
+                    settings.updateMotifDict(data.get("motifDict", {}))
                     self.updateUIFromSettings()
                 self.load_all_button.setText("Loaded!")
                 self.load_all_button.setEnabled(False)
@@ -1344,6 +1680,7 @@ class MainWindow(QMainWindow):
                     self.exclusionAndScoringDict = data.get(
                         "exclusionAndScoringDict", []
                     )
+                    settings.updateMotifDict(data.get("motifDict", {}))
                     self.updateUIFromSettings()
                 self.load_scoring_button.setText("Loaded!")
                 self.load_scoring_button.setEnabled(False)
@@ -1449,10 +1786,9 @@ class MainWindow(QMainWindow):
         allGood, ErrorMessage = self.runChecksOnSettings1()
         if allGood == True:
 
-            self.settingsScreen2 = self.createSettingsScreen2()
-            self.stackedWidget.addWidget(self.settingsScreen2)  # index 5
+            self.replaceScreen("settingsScreen2", self.createSettingsScreen2())
             if self.basicNeedsDict["RunDefaultParam"] == False:
-                self.showNextSettingsScreen()
+                self.stackedWidget.setCurrentWidget(self.settingsScreen2)
             else:
                 self.skipToSequenceInput()
         else:
@@ -1508,18 +1844,15 @@ class MainWindow(QMainWindow):
     def skipToSequenceInput(self):
         # Adds to stack anyway but skips over them
 
-        self.settingsScreen3 = self.createSettingsScreen3()
-        self.stackedWidget.addWidget(self.settingsScreen3)  # index 6
-        # Create and add the sequence input screen dynamically at index 7
-        self.sequenceInputScreen = self.createSequenceInputScreen()
-        self.stackedWidget.addWidget(self.sequenceInputScreen)  # index 7
+        self.replaceScreen("settingsScreen3", self.createSettingsScreen3())
+        # Create and add the sequence input screen dynamically
+        self.replaceScreen("sequenceInputScreen", self.createSequenceInputScreen())
 
-        # Create loading Screen and at at index 8
-        self.loadingScreen = self.createLoadingScreen()
-        self.stackedWidget.addWidget(self.loadingScreen)  # index 6
+        # Create loading Screen
+        self.replaceScreen("loadingScreen", self.createLoadingScreen())
 
         # Navigate to the sequence input screen
-        self.stackedWidget.setCurrentIndex(7)
+        self.stackedWidget.setCurrentWidget(self.sequenceInputScreen)
 
     def createHomeWidget(self):
         widget = QWidget()
@@ -1629,7 +1962,7 @@ class MainWindow(QMainWindow):
             """
         )
         analysis_button.clicked.connect(
-            lambda: self.stackedWidget.setCurrentWidget(self.settingsScreen1)
+            lambda: self.stackedWidget.setCurrentIndex(4)
         )
         button_layout.addWidget(analysis_button)
 
@@ -1661,10 +1994,7 @@ class MainWindow(QMainWindow):
         layout.addWidget(separator)
 
         # Read and convert Markdown to HTML
-        markdown_file_path = resource_path("MarkDownFiles/InformationPage.md")
-        with open(markdown_file_path, "r", encoding="utf-8") as file:
-            markdown_content = file.read()
-        html_content = markdown.markdown(markdown_content)
+        html_content = renderMarkdown("MarkDownFiles/InformationPage.md")
 
         # Create a QTextEdit widget to display the HTML content
         info_text_edit = QTextEdit()
@@ -1730,10 +2060,7 @@ class MainWindow(QMainWindow):
         layout.addWidget(separator)
 
         # Read and convert Markdown to HTML
-        markdown_file_path = resource_path("MarkDownFiles/UsagePage.md")
-        with open(markdown_file_path, "r", encoding="utf-8") as file:
-            markdown_content = file.read()
-        html_content = markdown.markdown(markdown_content)
+        html_content = renderMarkdown("MarkDownFiles/UsagePage.md")
 
         # Create a QTextEdit widget to display the HTML content
         info_text_edit = QTextEdit()
@@ -1875,51 +2202,6 @@ def runApp():
 # BACKEND
 
 
-def runBackend():
-
-    # gets mRNA from user or specified source and returns string with just agcu lowercase
-    mRNA = MRNA()
-
-    # gets mRNA all set up with its attributes
-    mRNA.getMRNA()
-
-    # generates subsequences of REVERSE COMPLIMENT of input as list of RNA objects
-    siRNAs = mRNA.generatesiRNASeq(
-        settings.basicNeedsDict["minLengthChecked"],
-        settings.basicNeedsDict["maxLengthCHecked"],
-    )
-
-    # Excludes RNA based on input parameters and returns touple of Lists 'keptRNAs, excludedRNAs' which contain RNA Objects
-    kept, removed = basicExclusion(siRNAs, settings.exclusionAndScoringDict)
-
-    # Score RNAs
-    scoredRNA = scoreRNA(kept, settings.exclusionAndScoringDict)
-
-    # sort by highest to lowest score
-    sortedRNA = bubbleSortRNAs(scoredRNA)
-
-    # gets top n RNAs
-    topRNAs = topNRNAs(sortedRNA, settings.basicNeedsDict["HowManyRNAOutput"])
-
-    # saves Settings file
-    if (
-        settings.basicNeedsDict["saveSettings"] == True
-        and settings.basicNeedsDict["OutputFileName"] != ""
-    ):
-
-        settings.saveDataJson(settings.basicNeedsDict["OutputFileName"])
-
-    # generates and saves reports to global variable
-    RNAreports = generateRNAreports(topRNAs, settings.exclusionAndScoringDict)
-    OverviewReport = generateOverviewReport()
-
-    reports = []
-    reports.append(OverviewReport)
-    reports.extend(RNAreports)
-    global resultsReport
-    resultsReport = reports
-
-
 def get_base_dir():
     """
     Returns the base directory of the executable. This will be the directory
@@ -0,0 +1,74 @@
+"""
+File contains the accessibility index of the parent mRNA, made once from its fold (see MRNA.setFoldProfile)
+The structure is turned into a running total of paired bases, so the number of paired bases under any stretch of the mRNA
+is two lookups. That answers the loose mRNA properties (siRNAObj.withinLooseMRNARegion, fivePrimeEndOnLoosemRNA,
+threePrimeEndOnLoosemRNA) for one siRNA or for every row of a candidate table at once.
+
+When the mRNA was folded locally, a running total of each base's unpaired probability is kept as well, giving the
+mean accessibility of any target site.
+
+Positions are the siRNA's threePrimeSpot and fivePrimeSpot, counted from 1 along the mRNA.
+
+"""
+
+import numpy as np
+
+from Main_Files.sequenceFeatures import runningTotal
+
+# Symbols marking a paired base of the parent mRNA's structure, "|" comes from local folding (see MRNA.runLocalFolding)
+pairedSymbols = "()|"
+
+
+def sliceBounds(begin, end, length):
+    # The bounds python would use for struct[begin:end], negative begins included
+    begin = np.clip(np.where(begin < 0, begin + length, begin), 0, length)
+    end = np.clip(np.where(end < 0, end + length, end), 0, length)
+    return begin, np.maximum(begin, end)
+
+
+class AccessibilityIndex:
+    def __init__(self, struct, unpairedProbabilities=None):
+        self.length = len(struct)
+        symbols = np.frombuffer(struct.encode("ascii"), dtype=np.uint8)
+        paired = np.isin(symbols, [ord(symbol) for symbol in pairedSymbols])
+        self.pairedTotal = runningTotal(paired)
+
+        self.unpairedTotal = None
+        if unpairedProbabilities is not None:
+            self.unpairedTotal = np.zeros(self.length + 1)
+            np.cumsum(unpairedProbabilities, out=self.unpairedTotal[1:])
+
+    def pairedCount(self, begin, end):
+        begin, end = sliceBounds(np.asarray(begin), np.asarray(end), self.length)
+        return self.pairedTotal[end] - self.pairedTotal[begin]
+
+    def looseRegion(self, threePrimeSpot, fivePrimeSpot):  # siRNAObj.withinLooseMRNARegion
+        # No more than half of the bases the siRNA binds are paired
+        threePrimeSpot = np.asarray(threePrimeSpot)
+        fivePrimeSpot = np.asarray(fivePrimeSpot)
+        paired = self.pairedCount(threePrimeSpot - 1, fivePrimeSpot)
+        return ~(paired / (fivePrimeSpot - threePrimeSpot + 1) > 0.5)
+
+    def fivePrimeLoose(self, fivePrimeSpot):  # siRNAObj.fivePrimeEndOnLoosemRNA
+        # None of the three bases ending at the siRNA's 5' end are paired
+        fivePrimeSpot = np.asarray(fivePrimeSpot)
+        return self.pairedCount(fivePrimeSpot - 3, fivePrimeSpot) == 0
+
+    def threePrimeLoose(self, threePrimeSpot):  # siRNAObj.threePrimeEndOnLoosemRNA
+        # None of the three bases starting at the siRNA's 3' end are paired
+        threePrimeSpot = np.asarray(threePrimeSpot)
+        return self.pairedCount(threePrimeSpot - 1, threePrimeSpot + 2) == 0
+
+    def meanUnpaired(self, threePrimeSpot, fivePrimeSpot):
+        """
+        Mean probability of the bases the siRNA binds being unpaired, from the local fold if there was one,
+        otherwise the fraction of them unpaired in the structure.
+        """
+        begin, end = sliceBounds(
+            np.asarray(threePrimeSpot) - 1, np.asarray(fivePrimeSpot), self.length
+        )
+        baseCount = np.maximum(end - begin, 1)
+        if self.unpairedTotal is None:
+            paired = self.pairedTotal[end] - self.pairedTotal[begin]
+            return 1 - paired / baseCount
+        return (self.unpairedTotal[end] - self.unpairedTotal[begin]) / baseCount
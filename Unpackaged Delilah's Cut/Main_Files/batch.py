@@ -0,0 +1,292 @@
+"""
+BATCH FILE
+Designs siRNAs for many transcripts in one go, e.g. a gene panel or every transcript of a multi-FASTA, without the GUI.
+
+Usage (from the folder holding Main_Files):
+    python Main_Files/batch.py INPUT --out RESULTS_DIR [--settings PROFILE] [--workers N]
+
+INPUT is a FASTA file (one or more records) or a directory of FASTA and plain sequence text files.
+Transcripts are spread over a pool of worker processes, each designing them with designApi.design (the GUI's pipeline)
+with its own folding server. Every finished transcript is written to RESULTS_DIR/<transcript>.json (same layout as
+cli.py's json output) the moment it is done, and recorded in RESULTS_DIR/checkpoint.jsonl.
+
+Running again with the same RESULTS_DIR skips every transcript already in the checkpoint, so an interrupted batch picks up
+where it stopped. A transcript that fails is recorded as failed and the rest of the batch carries on, run warnings
+(e.g. START CODON NOT FOUND) are recorded with each transcript. The exit status is 1 while the checkpoint holds any
+failed transcript, from this run or an earlier one, until --retry-failed designs it.
+
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Add the parent directory of `Main_Files` to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Main_Files.settings as settings
+from Main_Files.designApi import design
+from Main_Files.cli import findSettingsFile
+
+CHECKPOINT_NAME = "checkpoint.jsonl"
+FASTA_ENDINGS = (".fa", ".fasta", ".fna", ".ffn", ".txt")
+
+
+def readFasta(path):
+    """
+    Yields (name, sequence) for every record, a file without any ">" header is one record named after the file.
+    """
+    name = None
+    lines = []
+    with open(path, "r") as file:
+        for line in file:
+            line = line.strip()
+            if line.startswith(">"):
+                if name is not None or lines:
+                    yield name, "".join(lines)
+                header = line[1:].split()
+                name = header[0] if header else ""
+                lines = []
+            elif line:
+                lines.append(line)
+    if name is not None or lines:
+        yield name, "".join(lines)
+
+
+def readTranscripts(inputPath):
+    if os.path.isdir(inputPath):
+        paths = [
+            os.path.join(inputPath, fileName)
+            for fileName in sorted(os.listdir(inputPath))
+            if fileName.lower().endswith(FASTA_ENDINGS)
+        ]
+    else:
+        paths = [inputPath]
+
+    # Names become file names, so they are made safe and unique
+    usedNames = set()
+    for path in paths:
+        fileStem = os.path.splitext(os.path.basename(path))[0]
+        for name, sequence in readFasta(path):
+            name = re.sub(r"[^A-Za-z0-9._-]", "_", name or fileStem) or fileStem
+            uniqueName = name
+            copy = 2
+            while uniqueName in usedNames:
+                uniqueName = f"{name}_{copy}"
+                copy += 1
+            usedNames.add(uniqueName)
+            yield uniqueName, sequence
+
+
+def readCheckpoint(resultsDir):
+    # transcript name -> its last checkpoint record
+    path = os.path.join(resultsDir, CHECKPOINT_NAME)
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, "r") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by an interruption, that transcript simply runs again
+                continue
+            records[record["name"]] = record
+    return records
+
+
+def failedTranscripts(resultsDir):
+    # Names of the transcripts whose last checkpoint record is a failure
+    return sorted(
+        name
+        for name, record in readCheckpoint(resultsDir).items()
+        if record["status"] == "failed"
+    )
+
+
+def endPartialLine(path):
+    # An interrupted write can leave the checkpoint without its last newline, new records must start on their own line
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, "rb+") as file:
+        file.seek(-1, os.SEEK_END)
+        if file.read(1) != b"\n":
+            file.write(b"\n")
+
+
+def appendCheckpoint(checkpointFile, record):
+    checkpointFile.write(json.dumps(record) + "\n")
+    checkpointFile.flush()
+    os.fsync(checkpointFile.fileno())
+
+
+def initWorker(settingsPath):
+    # Runs once in each worker process, the profile becomes the defaults of every transcript that worker designs
+    if settingsPath:
+        settings.loadDataJson(settingsPath)
+    # Transcripts already run side by side, one folding process per worker keeps the cores from being oversubscribed
+    settings.foldingOpt["workers"] = 1
+
+
+def designTranscript(name, sequence, resultsDir, sequenceType, options):
+    """
+    Runs in a worker, writes the transcript's results and returns its checkpoint record.
+    """
+    record = {"name": name, "length": len(sequence)}
+    warnings = []
+    try:
+        if not sequence.strip():
+            raise ValueError("Transcript has no sequence")
+        result = design(sequence, sequenceType=sequenceType, name=name, **options)
+        warnings = result.warnings
+
+        # Written to a temporary file first, so a result file is never half written
+        resultFile = name + ".json"
+        path = os.path.join(resultsDir, resultFile)
+        with open(path + ".tmp", "w") as file:
+            json.dump(result.asDict(), file, indent=4)
+        os.replace(path + ".tmp", path)
+
+        record.update(
+            status="done",
+            resultFile=resultFile,
+            siRNACount=len(result.siRNAs),
+            nonExcludedCount=result.nonExcludedCount,
+        )
+    except (Exception, SystemExit):
+        record.update(status="failed", error=traceback.format_exc())
+    record["warnings"] = warnings
+    return record
+
+
+def runBatch(
+    inputPath,
+    resultsDir,
+    settingsPath=None,
+    workers=None,
+    options=None,
+    sequenceType="auto",
+    retryFailed=False,
+):
+    """
+    Designs every transcript of inputPath not yet in resultsDir's checkpoint, returns the records of this run.
+    """
+    os.makedirs(resultsDir, exist_ok=True)
+    finished = readCheckpoint(resultsDir)
+    todo = [
+        (name, sequence)
+        for name, sequence in readTranscripts(inputPath)
+        if name not in finished
+        or (retryFailed and finished[name]["status"] == "failed")
+    ]
+    print(
+        f"{len(todo)} transcripts to design, {len(finished)} already in the checkpoint",
+        file=sys.stderr,
+    )
+
+    records = []
+    if not todo:
+        return records
+
+    checkpointPath = os.path.join(resultsDir, CHECKPOINT_NAME)
+    endPartialLine(checkpointPath)
+    with open(checkpointPath, "a") as checkpointFile, ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count() or 1,
+        initializer=initWorker,
+        initargs=(settingsPath,),
+    ) as pool:
+        futures = {
+            pool.submit(
+                designTranscript, name, sequence, resultsDir, sequenceType, options or {}
+            ): name
+            for name, sequence in todo
+        }
+        for future in as_completed(futures):
+            try:
+                record = future.result()
+            except Exception:
+                # The worker itself died, the transcript is recorded as failed like any other
+                record = {
+                    "name": futures[future],
+                    "status": "failed",
+                    "error": traceback.format_exc(),
+                    "warnings": [],
+                }
+            appendCheckpoint(checkpointFile, record)
+            records.append(record)
+            print(
+                f"[{len(records)}/{len(todo)}] {record['name']}: {record['status']}",
+                file=sys.stderr,
+            )
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Design siRNAs for every transcript of a FASTA file or directory."
+    )
+    parser.add_argument("input", help="FASTA file, or directory of sequence files")
+    parser.add_argument("--out", required=True, help="results directory")
+    parser.add_argument(
+        "--settings", help="saved settings file, as a path or a name in Saved_Settings"
+    )
+    parser.add_argument(
+        "--workers", type=int, help="transcripts designed at once (default: one per core)"
+    )
+    parser.add_argument("--top", type=int, help="how many siRNAs to report per transcript")
+    parser.add_argument("--min-length", type=int, help="shortest siRNA to generate")
+    parser.add_argument("--max-length", type=int, help="longest siRNA to generate")
+    parser.add_argument(
+        "--type",
+        choices=["auto", "cdna", "mrna"],
+        default="auto",
+        help="sequence type, auto treats sequences with T and no U as cDNA",
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="run transcripts recorded as failed again",
+    )
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        parser.error("input not found: " + args.input)
+    settingsPath = None
+    if args.settings:
+        settingsPath = findSettingsFile(args.settings)
+        if not os.path.exists(settingsPath):
+            parser.error("settings file not found: " + args.settings)
+
+    # Passed on to designApi.design for every transcript
+    options = {
+        "topN": args.top,
+        "minLength": args.min_length,
+        "maxLength": args.max_length,
+    }
+
+    runBatch(
+        args.input,
+        args.out,
+        settingsPath,
+        args.workers,
+        options,
+        args.type,
+        args.retry_failed,
+    )
+    # Transcripts failed in earlier runs and not retried still count, the batch is only done once none is left
+    failed = failedTranscripts(args.out)
+    if failed:
+        print(
+            "Failed (run again with --retry-failed): " + ", ".join(failed),
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
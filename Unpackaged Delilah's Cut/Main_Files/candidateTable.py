@@ -0,0 +1,298 @@
+"""
+File contains the candidate table, a column per property version of the siRNA Objects
+Every window of the mRNA is a row: its position, length, GC content, fold and one boolean column per property.
+siRNA Objects are only made for the rows that end up in a report (see getRNAObj).
+
+Sequence features come from the parent mRNA's SequenceFeatures (see sequenceFeatures.py), motifs from its MotifScanner
+(see motifScanner.py) and structure features from its AccessibilityIndex (see accessibilityIndex.py), computed for every row at once.
+Columns are computed the first time they are asked for, so only the properties a run actually uses are computed.
+A property without a column builder below (e.g. a newly added siRNAObj function) is read off temporary siRNA Objects instead,
+so adding a function to siRNA.py and its entry in settings.py still works as before.
+
+"""
+
+import numpy as np
+
+from Main_Files.siRNA import siRNAObj
+from Main_Files.sequenceFeatures import A, C, G, U
+
+
+class CandidateTable:
+    def __init__(self, parentMRNA, starts, lengths):
+        self.parentMRNA = parentMRNA
+
+        # Index of each window within parentMRNA.reverseCompSeq, and its length
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+
+        # Same numbering as siRNAObj.threePrimeSpot and siRNAObj.fivePrimeSpot
+        mRNALen = len(parentMRNA.sequence)
+        self.threePrimeSpot = mRNALen - (self.starts + self.lengths - 1)
+        self.fivePrimeSpot = self.threePrimeSpot + self.lengths - 1
+
+        rowCount = len(self.starts)
+        self.mfe = np.full(rowCount, np.nan)
+        self.basePairsNum = np.full(rowCount, -1, dtype=np.int32)
+        self.isFolded = np.zeros(rowCount, dtype=bool)
+
+        self.isExcluded = np.zeros(rowCount, dtype=bool)
+        # One (reason texts, reason bitmask per row) pair per exclusion run, bit i set means reason i applies
+        # Only turned into text for rows that get a siRNA Object (see reasonsFor)
+        self.exclusionPasses = []
+        self.score = np.full(rowCount, np.nan)
+
+        # propName (or numeric attribute such as GCPer) -> array, filled on demand by column()
+        self.columns = {}
+        self.rnaObjs = {}
+
+    @classmethod
+    def fromMRNA(cls, parentMRNA, minLength, maxLength):
+        # All windows of every length, in the same order generatesiRNASeq has always used (by length, then position)
+        mRNALen = len(parentMRNA.sequence)
+        starts = []
+        lengths = []
+        for length in range(minLength, maxLength + 1):
+            windowCount = max(0, 1 + mRNALen - length)
+            starts.append(np.arange(windowCount, dtype=np.int64))
+            lengths.append(np.full(windowCount, length, dtype=np.int64))
+        if not starts:
+            return cls(parentMRNA, [], [])
+        return cls(parentMRNA, np.concatenate(starts), np.concatenate(lengths))
+
+    @classmethod
+    def blocksFromMRNA(cls, parentMRNA, minLength, maxLength, blockSize):
+        # Same windows in the same order as fromMRNA, as tables of at most blockSize rows
+        mRNALen = len(parentMRNA.sequence)
+        for length in range(minLength, maxLength + 1):
+            windowCount = max(0, 1 + mRNALen - length)
+            for firstStart in range(0, windowCount, blockSize):
+                starts = np.arange(
+                    firstStart, min(firstStart + blockSize, windowCount), dtype=np.int64
+                )
+                yield cls(parentMRNA, starts, np.full(len(starts), length, dtype=np.int64))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def sequence(self, row):
+        start = self.starts[row]
+        return self.parentMRNA.reverseCompSeq[start : start + self.lengths[row]]
+
+    def sequences(self, rows=None):
+        revComp = self.parentMRNA.reverseCompSeq
+        starts, lengths = self.starts, self.lengths
+        if rows is not None:
+            starts, lengths = starts[rows], lengths[rows]
+        return [
+            revComp[start : start + length]
+            for start, length in zip(starts.tolist(), lengths.tolist())
+        ]
+
+    def subset(self, rows):
+        """
+        Returns a new table holding only the given rows (an index array or boolean mask), in that order.
+        """
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        rows = rows.astype(np.int64)
+
+        table = CandidateTable.__new__(CandidateTable)
+        table.parentMRNA = self.parentMRNA
+        for name in [
+            "starts",
+            "lengths",
+            "threePrimeSpot",
+            "fivePrimeSpot",
+            "mfe",
+            "basePairsNum",
+            "isFolded",
+            "isExcluded",
+            "score",
+        ]:
+            setattr(table, name, getattr(self, name)[rows])
+        table.columns = {name: values[rows] for name, values in self.columns.items()}
+
+        table.exclusionPasses = [
+            (reasonTexts, bits[rows]) for reasonTexts, bits in self.exclusionPasses
+        ]
+
+        oldRows = rows.tolist()
+        table.rnaObjs = {
+            newRow: self.rnaObjs[oldRow]
+            for newRow, oldRow in enumerate(oldRows)
+            if oldRow in self.rnaObjs
+        }
+        return table
+
+    def setFolds(self, energies, basePairs):
+        self.mfe = np.asarray(energies, dtype=float)
+        self.basePairsNum = np.asarray(basePairs, dtype=np.int32)
+        self.isFolded = np.ones(len(self), dtype=bool)
+        self.columns.pop("isAllUnfolded", None)
+
+    def column(self, name):
+        if name not in self.columns:
+            builder = columnBuilders.get(name)
+            if builder is not None:
+                self.columns[name] = builder(self)
+            else:
+                self.columns[name] = self.columnFromRNAObjs(name)
+        return self.columns[name]
+
+    def columnFromRNAObjs(self, name):
+        # Slow path for properties without a column builder, makes a throwaway siRNA Object per row
+        values = [getattr(self.makeRNAObj(row), name) for row in range(len(self))]
+        return np.array(values)
+
+    def makeRNAObj(self, row):
+        if self.isFolded[row]:
+            return siRNAObj(
+                self.sequence(row),
+                int(self.threePrimeSpot[row]),
+                int(self.fivePrimeSpot[row]),
+                parentMRNA=self.parentMRNA,
+                energy=float(self.mfe[row]),
+                basePairsNum=int(self.basePairsNum[row]),
+            )
+        return siRNAObj(
+            self.sequence(row),
+            int(self.threePrimeSpot[row]),
+            int(self.fivePrimeSpot[row]),
+            parentMRNA=self.parentMRNA,
+        )
+
+    def reasonsFor(self, row):
+        reasons = []
+        for reasonTexts, bits in self.exclusionPasses:
+            rowBits = int(bits[row])
+            reasons.extend(
+                text for bit, text in enumerate(reasonTexts) if rowBits >> bit & 1
+            )
+        return reasons
+
+    def getRNAObj(self, row):
+        """
+        Returns the siRNA Object for a row (made once, on first request) carrying the row's score and exclusion.
+        """
+        if row not in self.rnaObjs:
+            RNA = self.makeRNAObj(row)
+            RNA.score = None if np.isnan(self.score[row]) else float(self.score[row])
+            RNA.isExcluded = bool(self.isExcluded[row])
+            RNA.reasonsExcluded = self.reasonsFor(row)
+            self.rnaObjs[row] = RNA
+        return self.rnaObjs[row]
+
+
+# Column builders, each mirrors the siRNAObj function noted beside it and must give exactly the same values
+
+
+def gcPerColumn(table):  # siRNAObj.GCcontent
+    return table.parentMRNA.sequenceFeatures.GCPer(table.starts, table.lengths)
+
+
+def selectiveLoadingColumn(table):  # siRNAObj.fivePrimeLooseness
+    return table.parentMRNA.sequenceFeatures.selectiveLoading(
+        table.starts, table.lengths
+    )
+
+
+def positionColumn(position, bases):  # siRNAObj.AInTen, UInSixteen, CInSeven, startWithU, endsWithGOrC...
+    def builder(table):
+        return table.parentMRNA.sequenceFeatures.hasBaseAt(
+            table.starts, table.lengths, position, bases
+        )
+
+    return builder
+
+
+def gcInRangeColumn(table):  # siRNAObj.GCInRange
+    gcPer = table.column("GCPer")
+    return (gcPer > 0.30) & (gcPer < 0.65)
+
+
+def prefLoadedColumn(table):  # siRNAObj.isPrefLoaded
+    return table.column("selectiveLoading") > 0
+
+
+def lowGCNineFourteenColumn(table):  # siRNAObj.lowGCinNinetoFourteen
+    return table.parentMRNA.sequenceFeatures.lowGCNineFourteen(
+        table.starts, table.lengths
+    )
+
+
+def withinMRNARangeColumn(table):  # siRNAObj.withinMRNARange
+    parent = table.parentMRNA
+    return (
+        table.fivePrimeSpot
+        >= parent.startCodonPos + parent.context.sequenceOpt["howFarFromStartCodonInputSearch"]
+    ) & (
+        table.threePrimeSpot
+        <= parent.stopCodonPos - parent.context.sequenceOpt["howFarFromStopCodonInputSearch"]
+    )
+
+
+def looseRegionColumn(table):  # siRNAObj.withinLooseMRNARegion
+    return table.parentMRNA.accessibilityIndex.looseRegion(
+        table.threePrimeSpot, table.fivePrimeSpot
+    )
+
+
+def fivePrimeLooseColumn(table):  # siRNAObj.fivePrimeEndOnLoosemRNA
+    return table.parentMRNA.accessibilityIndex.fivePrimeLoose(table.fivePrimeSpot)
+
+
+def threePrimeLooseColumn(table):  # siRNAObj.threePrimeEndOnLoosemRNA
+    return table.parentMRNA.accessibilityIndex.threePrimeLoose(table.threePrimeSpot)
+
+
+def accessibilityColumn(table):
+    # Not a rule by itself, mean unpaired probability of each target site for anything that wants it
+    return table.parentMRNA.accessibilityIndex.meanUnpaired(
+        table.threePrimeSpot, table.fivePrimeSpot
+    )
+
+
+def motifColumn(propName):  # siRNAObj.cytoMotif, immuneMotif, hasGGGseq, hasCCCseq
+    def builder(table):
+        return table.parentMRNA.motifScanner.hasMotif(
+            propName, table.starts, table.lengths
+        )
+
+    return builder
+
+
+def gcsInRowColumn(table):  # siRNAObj.gcsInRow
+    return table.parentMRNA.motifScanner.hasNineGCinRow(table.starts, table.lengths)
+
+
+def isAllUnfoldedColumn(table):  # siRNAObj.isUnfolded
+    if not table.isFolded.all():
+        raise ValueError("isAllUnfolded needs every row of the table to be folded")
+    return table.basePairsNum == 0
+
+
+columnBuilders = {
+    "GCPer": gcPerColumn,
+    "selectiveLoading": selectiveLoadingColumn,
+    "accessibility": accessibilityColumn,
+    "isAllUnfolded": isAllUnfoldedColumn,
+    "hasUInPosOne": positionColumn(0, [U]),
+    "hasUOrAInPosOne": positionColumn(0, [U, A]),
+    "hasGOrCInLastPos": positionColumn(-1, [G, C]),
+    "GCWithinRange": gcInRangeColumn,
+    "isPreferablyLoaded": prefLoadedColumn,
+    "withinmRNARange": withinMRNARangeColumn,
+    "loosemRNARegion": looseRegionColumn,
+    "fivePrimeLoosemRNA": fivePrimeLooseColumn,
+    "threePrimeLoosemRNA": threePrimeLooseColumn,
+    "lowGCNineFourteen": lowGCNineFourteenColumn,
+    "hasAInTen": positionColumn(9, [A]),
+    "hasUInSixteen": positionColumn(15, [U]),
+    "hasCytoMotif": motifColumn("hasCytoMotif"),
+    "hasImmuneMotif": motifColumn("hasImmuneMotif"),
+    "hasNineGCinRow": gcsInRowColumn,
+    "hasGGG": motifColumn("hasGGG"),
+    "hasCCC": motifColumn("hasCCC"),
+    "hasCInSeven": positionColumn(6, [C]),
+}
@@ -0,0 +1,189 @@
+"""
+COMMAND LINE FILE
+Runs a design without the GUI, for scripts and machines without a display. PyQt6 is never imported, and reportlab only
+when a PDF is asked for, so the run starts folding right away.
+
+Usage (from the folder holding Main_Files):
+    python Main_Files/cli.py SEQUENCE_FILE [--settings PROFILE] [--format pdf|json|tsv|text] [--output PATH]
+
+SEQUENCE_FILE is a text file holding the sequence, or - to read it from stdin.
+PROFILE is a settings file saved by the GUI, as a path or a name within Saved_Settings. Without one, the defaults in
+settings.py are used. The options below override the profile.
+
+Same pipeline as the GUI's run button (see pipeline.runDesign), so the same settings give the same siRNAs.
+For calling the designer from python instead, see designApi.py.
+
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Add the parent directory of `Main_Files` to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Main_Files.settings as settings
+from Main_Files.runContext import RunContext
+from Main_Files.pipeline import runDesign
+from Main_Files.designApi import DesignResult
+from Main_Files.weightSensitivity import WeightSensitivity
+
+
+def parseArgs(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Design siRNAs against an mRNA or cDNA sequence without the GUI."
+    )
+    parser.add_argument("sequence", help="sequence text file, or - for stdin")
+    parser.add_argument(
+        "--settings", help="saved settings file, as a path or a name in Saved_Settings"
+    )
+    parser.add_argument(
+        "--format", choices=["pdf", "json", "tsv", "text"], default="json"
+    )
+    parser.add_argument(
+        "--output",
+        help="where to write the results, - for stdout (default: the run name in PDF_Outputs for pdf, stdout otherwise)",
+    )
+    parser.add_argument("--top", type=int, help="how many siRNAs to report")
+    parser.add_argument("--min-length", type=int, help="shortest siRNA to generate")
+    parser.add_argument("--max-length", type=int, help="longest siRNA to generate")
+    sequenceType = parser.add_mutually_exclusive_group()
+    sequenceType.add_argument("--cdna", action="store_true", help="sequence is cDNA")
+    sequenceType.add_argument("--mrna", action="store_true", help="sequence is mRNA")
+    parser.add_argument("--name", help="run name shown in the reports")
+    parser.add_argument(
+        "--sensitivity",
+        choices=["off", "sampled", "grid"],
+        help="also rank the siRNAs under perturbed scoring weights and report how stable the top ones are",
+    )
+    parser.add_argument(
+        "--sensitivity-samples",
+        type=int,
+        help="how many weight vectors the sampled sensitivity analysis tries",
+    )
+    parser.add_argument(
+        "--save-settings",
+        action="store_true",
+        help="save this run's settings to Saved_Settings under the run name",
+    )
+    return parser, parser.parse_args(argv)
+
+
+def findSettingsFile(name):
+    if os.path.exists(name):
+        return name
+    if ".json" not in name:
+        name += ".json"
+    return settings.get_settings_file_path(name)
+
+
+def applyArgs(parser, args):
+    """
+    Returns the RunContext (see runContext.py) of the run the arguments ask for.
+    """
+    profile = None
+    if args.settings:
+        profile = findSettingsFile(args.settings)
+        if not os.path.exists(profile):
+            parser.error("settings file not found: " + args.settings)
+    context = RunContext.fromProfile(profile)
+    basicNeedsDict = context.basicNeedsDict
+
+    if args.sequence == "-":
+        basicNeedsDict["textFile(T)/CopyPasted(F)"] = False
+        context.sequence_dict["sequence"] = sys.stdin.read().replace("\n", " ")
+    else:
+        if not os.path.exists(args.sequence):
+            parser.error("sequence file not found: " + args.sequence)
+        basicNeedsDict["textFile(T)/CopyPasted(F)"] = True
+        # An absolute path is used as is by get_input_file_path
+        context.sequence_dict["file_name"] = os.path.abspath(args.sequence)
+
+    if args.top is not None:
+        basicNeedsDict["HowManyRNAOutput"] = args.top
+    if args.min_length is not None:
+        basicNeedsDict["minLengthChecked"] = args.min_length
+    if args.max_length is not None:
+        basicNeedsDict["maxLengthCHecked"] = args.max_length
+    if args.cdna or args.mrna:
+        basicNeedsDict["cDNA(T)/mRNA(F)"] = args.cdna
+    if args.name is not None:
+        basicNeedsDict["OutputFileName"] = args.name
+    elif not basicNeedsDict["OutputFileName"]:
+        basicNeedsDict["OutputFileName"] = os.path.splitext(
+            os.path.basename(args.sequence)
+        )[0]
+    basicNeedsDict["saveSettings"] = args.save_settings
+    if args.sensitivity is not None:
+        context.pipelineOpt["sensitivityMode"] = args.sensitivity
+    if args.sensitivity_samples is not None:
+        context.pipelineOpt["sensitivitySamples"] = args.sensitivity_samples
+
+    minLength = basicNeedsDict["minLengthChecked"]
+    maxLength = basicNeedsDict["maxLengthCHecked"]
+    if minLength < 1 or maxLength < minLength:
+        parser.error("lengths must satisfy 1 <= min length <= max length")
+    if context.pipelineOpt["sensitivityMode"] != "off":
+        # Checked before the run, a grid too large to evaluate would only be refused after the mRNA is folded
+        try:
+            WeightSensitivity(
+                context.exclusionAndScoringDict,
+                basicNeedsDict["HowManyRNAOutput"],
+                context.pipelineOpt,
+            )
+        except ValueError as error:
+            parser.error(str(error))
+    return context
+
+
+def writeTsv(stream, result):
+    propNames = [item["propName"] for item in result.context.exclusionAndScoringDict]
+    header = ["sequence", "length", "startPosition", "endPosition", "score", "mfe"]
+    stream.write("\t".join(header + propNames) + "\n")
+    for RNA in result.siRNAs:
+        row = [RNA.sequence, RNA.length, RNA.threePrimeSpot, RNA.fivePrimeSpot]
+        row += [RNA.score, RNA.mfe] + [getattr(RNA, name) for name in propNames]
+        stream.write("\t".join(str(value) for value in row) + "\n")
+
+
+def writeOutput(args, result):
+    if args.format == "pdf":
+        # Only PDFs need reportlab, so it isn't imported otherwise
+        from Main_Files.PDFresults import generate_results_pdf, get_output_file_path
+
+        fileName = (
+            args.output or result.context.basicNeedsDict["OutputFileName"] + ".pdf"
+        )
+        generate_results_pdf(result.reports, fileName)
+        print("Saved to " + get_output_file_path(fileName), file=sys.stderr)
+        return
+
+    if args.output and args.output != "-":
+        stream = open(args.output, "w", newline="")
+    else:
+        stream = sys.stdout
+    try:
+        if args.format == "json":
+            json.dump(result.asDict(), stream, indent=4)
+            stream.write("\n")
+        elif args.format == "tsv":
+            writeTsv(stream, result)
+        else:
+            for report in result.reports:
+                stream.write("\n".join(report) + "\n")
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+
+
+def main(argv=None):
+    parser, args = parseArgs(argv)
+    context = applyArgs(parser, args)
+    topRNAs, reports = runDesign(context)
+    writeOutput(args, DesignResult(context, topRNAs, reports))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
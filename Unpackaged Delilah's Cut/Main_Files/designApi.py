@@ -0,0 +1,125 @@
+"""
+File contains the library API, for using Delilah's Cut from other python code, e.g. a service designing for many users:
+    from Main_Files.designApi import design
+    result = design("AUGGCU...", profile="mySettings", topN=20)
+    for RNA in result.siRNAs: ...
+
+Every call gets its own RunContext (see runContext.py), so designs can run from many threads at once, or from an
+asyncio event loop through designAsync, without their settings or warnings mixing. The global settings in settings.py are
+only read, as the defaults of a run, and never changed.
+Runs share the process's folding servers (see processing.FoldingServerPool), up to foldingOpt["servers"] of them fold
+for different runs at the same time.
+
+"""
+
+import asyncio
+
+from Main_Files.runContext import RunContext
+from Main_Files.pipeline import runDesign
+
+
+def looksLikeCDNA(sequence):
+    lowered = sequence.lower()
+    return "t" in lowered and "u" not in lowered
+
+
+class DesignResult:
+    def __init__(self, context, siRNAs, reports):
+        self.context = context
+        # Top siRNA Objects, best first
+        self.siRNAs = siRNAs
+        # The overview report first, then one per siRNA, each a list of lines
+        self.reports = reports
+
+    @property
+    def warnings(self):
+        return list(self.context.userWarnings)
+
+    @property
+    def nonExcludedCount(self):
+        return self.context.totalNonExcludedRNAs
+
+    @property
+    def sensitivity(self):
+        # SensitivityResult, None unless the run asked for one
+        return self.context.sensitivity
+
+    def asDict(self):
+        """
+        The results as plain values, ready for json (see cli.py's json output).
+        """
+        propNames = [item["propName"] for item in self.context.exclusionAndScoringDict]
+        return {
+            "runName": self.context.basicNeedsDict["OutputFileName"],
+            "nonExcludedCount": self.nonExcludedCount,
+            "warnings": self.warnings,
+            "siRNAs": [
+                {
+                    "sequence": RNA.sequence,
+                    "length": RNA.length,
+                    "startPosition": RNA.threePrimeSpot,
+                    "endPosition": RNA.fivePrimeSpot,
+                    "score": RNA.score,
+                    "mfe": RNA.mfe,
+                    "properties": {name: getattr(RNA, name) for name in propNames},
+                }
+                for RNA in self.siRNAs
+            ],
+            "reports": self.reports,
+            "sensitivity": self.sensitivity.asDict() if self.sensitivity is not None else None,
+        }
+
+
+def design(
+    sequence,
+    profile=None,
+    sequenceType="auto",
+    topN=None,
+    minLength=None,
+    maxLength=None,
+    name=None,
+    sensitivity=None,
+):
+    """
+    Designs siRNAs against sequence and returns a DesignResult.
+    profile is a saved settings file (path or name within Saved_Settings), its dictionary, or None for the global settings.
+    sequenceType is "cdna", "mrna" or "auto" (cDNA when the sequence has T and no U), the other options override the profile.
+    sensitivity is a pipelineOpt["sensitivityMode"] (see weightSensitivity.py), its result is DesignResult.sensitivity.
+    """
+    if not sequence or not sequence.strip():
+        raise ValueError("No sequence given")
+
+    context = RunContext.fromProfile(profile)
+    basicNeedsDict = context.basicNeedsDict
+    if sequenceType == "auto":
+        basicNeedsDict["cDNA(T)/mRNA(F)"] = looksLikeCDNA(sequence)
+    elif sequenceType in ("cdna", "mrna"):
+        basicNeedsDict["cDNA(T)/mRNA(F)"] = sequenceType == "cdna"
+    else:
+        raise ValueError(f"Unknown sequence type: {sequenceType}")
+    if topN is not None:
+        basicNeedsDict["HowManyRNAOutput"] = topN
+    if minLength is not None:
+        basicNeedsDict["minLengthChecked"] = minLength
+    if maxLength is not None:
+        basicNeedsDict["maxLengthCHecked"] = maxLength
+    if name is not None:
+        basicNeedsDict["OutputFileName"] = name
+    if sensitivity is not None:
+        context.pipelineOpt["sensitivityMode"] = sensitivity
+    if not 1 <= basicNeedsDict["minLengthChecked"] <= basicNeedsDict["maxLengthCHecked"]:
+        raise ValueError("Lengths must satisfy 1 <= min length <= max length")
+
+    basicNeedsDict["textFile(T)/CopyPasted(F)"] = False
+    basicNeedsDict["saveSettings"] = False
+    context.sequence_dict["sequence"] = sequence
+
+    siRNAs, reports = runDesign(context)
+    return DesignResult(context, siRNAs, reports)
+
+
+async def designAsync(sequence, profile=None, **options):
+    """
+    design for asyncio, runs in a worker thread so the event loop keeps serving while the design runs.
+    """
+    return await asyncio.to_thread(design, sequence, profile, **options)
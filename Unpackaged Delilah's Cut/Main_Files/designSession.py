@@ -0,0 +1,129 @@
+"""
+File contains the design session, which keeps the expensive part of a run for the next one
+Users nearly always rerun the same sequence after moving a scoring slider or an exclusion checkbox. The session keeps
+the mRNA (folded, see MRNA.getMRNA), a table of every window with every fold made so far and the feature columns computed
+so far. While the sequence, cDNA/mRNA, lengths and folding options stay the same (see prefolding.foldKey), a run only
+folds windows no earlier run needed, computes columns no earlier run asked for, and re-runs exclusion, scoring and
+the top N. A change to any of them starts the session over.
+Runs on mRNAs long enough to stream (see pipeline.py) take the table a block at a time and fold only the block's new
+windows, the session then keeps the folds but no columns.
+
+Gives the same results as a run without a session (pipeline.runDesign).
+
+"""
+
+import copy
+import threading
+
+import numpy as np
+
+from Main_Files.candidateTable import CandidateTable, columnBuilders
+from Main_Files.pipeline import SiRNAPipeline, finishDesign
+from Main_Files.prefolding import PreparedFolds, foldKey
+from Main_Files.processing import MRNA
+
+# Columns that also depend on the run's settings and not only on the mRNA, dropped when those settings change
+SETTINGS_COLUMNS = {"withinmRNARange"}
+
+
+class SessionPipeline(SiRNAPipeline):
+    # Folds only the windows the session hasn't folded yet, and hands every new fold back to the session
+    def __init__(self, session, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.session = session
+
+    def foldBlock(self, block):
+        self.session.foldRows(block, self.reportFolding)
+
+
+class DesignSession:
+    """
+    Runs of one session happen one after the other, a second thread calling run waits for the first.
+    """
+
+    def __init__(self):
+        self.prepared = None
+        # Motif lists and sequence options the settings dependent columns were computed with
+        self.columnSettings = None
+        self.lock = threading.Lock()
+
+    def start(self, context):
+        # Sets the mRNA up, windows are only folded once a run needs them
+        mRNA = MRNA(context=context)
+        mRNA.getMRNA()
+        table = CandidateTable.fromMRNA(
+            mRNA,
+            context.basicNeedsDict["minLengthChecked"],
+            context.basicNeedsDict["maxLengthCHecked"],
+        )
+        self.prepared = PreparedFolds(foldKey(context), mRNA, table)
+        self.columnSettings = None
+
+    def rowsOf(self, block):
+        # Row of each window of block within the session's table, which holds every window by length, then position
+        minLength = int(self.prepared.table.lengths[0])
+        lengths = np.arange(minLength, block.lengths.max() + 1)
+        windowCounts = np.maximum(0, 1 + len(self.prepared.mRNA.sequence) - lengths)
+        firstRows = np.concatenate(([0], np.cumsum(windowCounts)[:-1]))
+        return firstRows[block.lengths - minLength] + block.starts
+
+    def foldRows(self, block, onFolded=None):
+        table = self.prepared.table
+        rows = self.rowsOf(block)
+        pending = ~table.isFolded[rows]
+        if pending.any():
+            newFolds = block.subset(pending)
+            self.prepared.mRNA.foldTable(newFolds, onFolded)
+            newRows = rows[pending]
+            table.mfe[newRows] = newFolds.mfe
+            table.basePairsNum[newRows] = newFolds.basePairsNum
+            table.isFolded[newRows] = True
+        block.setFolds(table.mfe[rows], table.basePairsNum[rows])
+
+    def dropStaleColumns(self, context):
+        # Columns made with other motif lists or sequence options than this run's
+        columnSettings = (context.motifDict, context.sequenceOpt)
+        if columnSettings != self.columnSettings:
+            staleNames = SETTINGS_COLUMNS | set(context.motifDict)
+            if self.columnSettings is not None:
+                staleNames |= set(self.columnSettings[0])
+            for name in staleNames:
+                self.prepared.table.columns.pop(name, None)
+            self.columnSettings = copy.deepcopy(columnSettings)
+
+    def keepColumns(self, runTable):
+        # Columns computed for every window during the run are kept for the next one
+        for name, values in runTable.columns.items():
+            if name in columnBuilders and name != "isAllUnfolded":
+                self.prepared.table.columns.setdefault(name, values)
+
+    def run(self, context, prepared=None):
+        """
+        Runs the design of context (see runContext.py), returns the top siRNA Objects and the reports like runDesign.
+        prepared is PreparedFolds made ahead of time (see prefolding.py), used when it matches context.
+        """
+        key = foldKey(context)
+        with self.lock:
+            if prepared is not None and prepared.key == key:
+                if self.prepared is not prepared:
+                    self.prepared = prepared
+                    self.columnSettings = None
+            elif self.prepared is None or key is None or self.prepared.key != key:
+                self.start(context)
+
+            self.dropStaleColumns(context)
+            mRNA, runTable = self.prepared.forRun(context)
+
+            basicNeedsDict = context.basicNeedsDict
+            pipeline = SessionPipeline(
+                self,
+                mRNA,
+                basicNeedsDict["minLengthChecked"],
+                basicNeedsDict["maxLengthCHecked"],
+                context.exclusionAndScoringDict,
+                basicNeedsDict["HowManyRNAOutput"],
+                foldedTable=runTable,
+            )
+            selector = pipeline.run()
+            self.keepColumns(runTable)
+            return finishDesign(context, selector, pipeline.sensitivity)
@@ -5,11 +5,20 @@ File that runs exclusion and scoring, as well as initial report generation
 """
 
 import datetime
+import functools
+import numpy as np
 import Main_Files.settings as settings
+from Main_Files.siRNA import foldDependentProps
+from Main_Files.candidateTable import CandidateTable
+from Main_Files.topNSelector import TopNSelector
 
 
 # intake a list of RNA Objects, and a list of settings to exclude by and exclude them from list based on properties.
+# Also takes a CandidateTable, then returns a touple of tables instead
 def basicExclusion(RNAObjs, settingsList):
+    if isinstance(RNAObjs, CandidateTable):
+        return tableExclusion(RNAObjs, settingsList)
+
     RNAs = RNAObjs.copy()
 
     keptRNAs = []
@@ -53,8 +62,30 @@ def basicExclusion(RNAObjs, settingsList):
     return (keptRNAs, excludedRNAs)
 
 
+# Same as basicExclusion but for the whole table at once, see CompiledRules
+def tableExclusion(table, settingsList):
+    rules = compileRules(settingsList)
+    reasonBits = rules.exclusionBitmasks(table)
+    table.exclusionPasses.append((rules.reasonTexts, reasonBits))
+
+    isExcluded = table.isExcluded | (reasonBits != 0)
+    table.isExcluded = isExcluded
+    return (table.subset(~isExcluded), table.subset(isExcluded))
+
+
+# Runs only the exclusions that don't need the siRNA's own fold, so only the survivors have to be folded
+# Excluded RNAs get reasons for these rules only, fold dependent rules are never evaluated for them
+def preFoldExclusion(RNAObjs, settingsList):
+    sequenceOnlySettings = [
+        item for item in settingsList if item["propName"] not in foldDependentProps
+    ]
+    return basicExclusion(RNAObjs, sequenceOnlySettings)
+
+
 # intake list of RNA objects (post exlusion), and list of dictionarys with 'propName', 'wantedVal' 'scoreVal', updates RNA Objects, returns same list
 def scoreRNA(RNAObjs, ListODictBools):
+    if isinstance(RNAObjs, CandidateTable):
+        return scoreTable(RNAObjs, ListODictBools)
 
     # Scoring RNAs, Out of 100
     for RNA in RNAObjs:
@@ -77,22 +108,146 @@ def scoreRNA(RNAObjs, ListODictBools):
     return RNAObjs
 
 
-# take in RNAList and return it sorted by score value
-def bubbleSortRNAs(RNAObjs):
+# Same as scoreRNA for a CandidateTable, see CompiledRules
+def scoreTable(table, ListODictBools):
+    table.score = compileRules(ListODictBools).scores(table)
+    return table
+
+
+class CompiledRules:
+    """
+    A settings list (see settings.exclusionAndScoringDict) turned into arrays once, so a CandidateTable is
+    excluded with one mask reduction and scored with one matrix-vector product over its feature matrix.
+    """
+
+    def __init__(self, settingsList):
+        # Rules excluding on False come first, then the ones excluding on True, the order basicExclusion gives reasons in
+        exclusionRules = []
+        for excludedOn in [False, True]:
+            for item in settingsList:
+                if item["exclusionary"] == True and item["wantedVal"] == (not excludedOn):
+                    exclusionRules.append((item["propName"], excludedOn))
+        if len(exclusionRules) > 64:
+            raise ValueError("At most 64 exclusionary settings fit in a reason bitmask")
+
+        # Each property is one column of the feature matrix, however many rules use it
+        self.exclusionProps = list(dict.fromkeys(prop for prop, _ in exclusionRules))
+        self.exclusionColumns = np.array(
+            [self.exclusionProps.index(prop) for prop, _ in exclusionRules], dtype=np.intp
+        )
+        self.excludedOn = np.array([on for _, on in exclusionRules], dtype=bool)
+        # Bit i of a row's reason bitmask is set when the row fails exclusion rule i
+        self.reasonBits = np.left_shift(
+            np.uint64(1), np.arange(len(exclusionRules), dtype=np.uint64)
+        )
+        self.reasonTexts = [
+            prop + " is " + str(excludedOn) + " and was thus excluded"
+            for prop, excludedOn in exclusionRules
+        ]
+
+        # Rules worth nothing can't change a score, so their properties are never computed for scoring
+        scoringRules = [
+            item
+            for item in settingsList
+            if item["exclusionary"] == False and item["scoreVal"] != 0
+        ]
+        self.scoringProps = list(dict.fromkeys(item["propName"] for item in scoringRules))
+        self.scoringColumns = np.array(
+            [self.scoringProps.index(item["propName"]) for item in scoringRules],
+            dtype=np.intp,
+        )
+        self.wantedVals = np.array([item["wantedVal"] for item in scoringRules], dtype=bool)
+        # Whole number weights stay integers, so scores add up exactly as in scoreRNA
+        weights = [item["scoreVal"] for item in scoringRules]
+        self.weights = np.array(weights, dtype=np.result_type(np.int64, *weights))
+        self.potentialScore = self.weights.sum().item()
+
+    @staticmethod
+    def featureMatrix(table, propNames):
+        matrix = np.zeros((len(table), len(propNames)), dtype=bool)
+        for index, propName in enumerate(propNames):
+            matrix[:, index] = table.column(propName)
+        return matrix
+
+    def exclusionBitmasks(self, table):
+        features = self.featureMatrix(table, self.exclusionProps)
+        failed = features[:, self.exclusionColumns] == self.excludedOn
+        # The bits are distinct powers of two, so the dot product is the same as or-ing them together
+        return failed.astype(np.uint64) @ self.reasonBits
+
+    def matchedMatrix(self, table):
+        # Row i, column j is True when row i has the wanted value of scoring rule j
+        features = self.featureMatrix(table, self.scoringProps)
+        return features[:, self.scoringColumns] == self.wantedVals
+
+    def rawScores(self, table):
+        return self.matchedMatrix(table).astype(self.weights.dtype) @ self.weights
+
+    def scores(self, table):
+        # No scoring settings means nothing can be scored, scoreRNA divides by zero here
+        if self.potentialScore == 0:
+            return np.zeros(len(table))
+
+        # python's round rather than numpy's, so scores match scoreRNA to the last digit
+        # Only a handful of distinct raw scores exist, so each is rounded once
+        rawValues, rowValue = np.unique(self.rawScores(table), return_inverse=True)
+        rounded = np.array(
+            [round(100 * (value / self.potentialScore), 2) for value in rawValues.tolist()]
+        )
+        return rounded[rowValue.reshape(-1)] if len(table) else np.zeros(0)
+
+
+def compileRules(settingsList):
+    # Settings lists are plain dicts that the GUI edits in place, so they are compiled by value
+    key = tuple(
+        (item["propName"], item["exclusionary"], item["wantedVal"], item["scoreVal"])
+        for item in settingsList
+    )
+    return compiledRulesFor(key)
+
+
+@functools.lru_cache(maxsize=16)
+def compiledRulesFor(key):
+    return CompiledRules(
+        [
+            {"propName": prop, "exclusionary": excl, "wantedVal": wanted, "scoreVal": weight}
+            for prop, excl, wanted, weight in key
+        ]
+    )
 
-    n = len(RNAObjs)
-    for i in range(n):
-        for j in range(0, n - i - 1):
-            if getattr(RNAObjs[j], "score") < getattr(RNAObjs[j + 1], "score"):
-                RNAObjs[j], RNAObjs[j + 1] = RNAObjs[j + 1], RNAObjs[j]
 
+# take in RNAList and return it sorted by score value
+# Only needed to see every RNA in order, topNRNAs picks the top ones without sorting
+def bubbleSortRNAs(RNAObjs):
+    if isinstance(RNAObjs, CandidateTable):
+        # Same order as TopNSelector: score, then start position, then length
+        return RNAObjs.subset(
+            np.lexsort((RNAObjs.lengths, RNAObjs.threePrimeSpot, -RNAObjs.score))
+        )
+
+    # python's sort is stable, so equal scores keep their order as they did with the bubble sort
+    RNAObjs.sort(key=lambda RNA: RNA.score, reverse=True)
     return RNAObjs
 
 
 # Return top N inputs of RNA List
-def topNRNAs(RNAObjs, n):
+# Also takes a scored CandidateTable, or a TopNSelector that tables have already been fed to (see topNSelector.py)
+# The number of non excluded siRNAs is recorded on the run's context (see runContext.py), or the global settings without one
+def topNRNAs(RNAObjs, n, context=None):
+    if context is None:
+        context = settings
+
+    if isinstance(RNAObjs, CandidateTable):
+        selector = TopNSelector(n)
+        selector.addTable(RNAObjs)
+        RNAObjs = selector
+
+    if isinstance(RNAObjs, TopNSelector):
+        context.totalNonExcludedRNAs = RNAObjs.total
+        # siRNA Objects are only made for the rows that are reported
+        return RNAObjs.rnaObjs()[:n]
 
-    settings.totalNonExcludedRNAs = len(RNAObjs)
+    context.totalNonExcludedRNAs = len(RNAObjs)
 
     if len(RNAObjs) < n:
         return RNAObjs
@@ -155,19 +310,21 @@ def generateRNAreports(RNAObjs, settingsDict):
     return listOfReports
 
 
-def generateOverviewReport():
+def generateOverviewReport(context=None):
+    if context is None:
+        context = settings
     report = []
 
     # Run Overview
     report.append("________________________________")
     report.append(
         'RUN OVERVIEW for run titled: "'
-        + str(settings.basicNeedsDict["OutputFileName"])
+        + str(context.basicNeedsDict["OutputFileName"])
         + '"'
     )
-    if len(settings.userWarnings) != 0:
+    if len(context.userWarnings) != 0:
         report.append("IRREGULARITIES WITHIN THE RUN FOUND: ")
-        for item in settings.userWarnings:
+        for item in context.userWarnings:
             report.append(item)
             report.append("________________________________")
 
@@ -175,11 +332,11 @@ def generateOverviewReport():
         "Date and Time of run: " + datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     )
     report.append(
-        "Number of non excluded siRNAs found: " + str(settings.totalNonExcludedRNAs)
+        "Number of non excluded siRNAs found: " + str(context.totalNonExcludedRNAs)
     )
 
     report.append(
-        f"How many of top siRNAs overviewed here: {settings.basicNeedsDict['HowManyRNAOutput']}"
+        f"How many of top siRNAs overviewed here: {context.basicNeedsDict['HowManyRNAOutput']}"
     )
     report.append("________________________________")
     report.append("")
@@ -191,26 +348,26 @@ def generateOverviewReport():
 
     report.append("mRNA Sequence: ")
 
-    length = len(settings.sequence_dict["sequence"])
+    length = len(context.sequence_dict["sequence"])
     lineLen = 65
     quotient, remainder = divmod(length, lineLen)
     for i in range(quotient):
         if i == 0:
             report.append(
                 "5' - "
-                + settings.sequence_dict["sequence"][i * lineLen : (i + 1) * lineLen]
+                + context.sequence_dict["sequence"][i * lineLen : (i + 1) * lineLen]
             )
         elif i == quotient and remainder == 0:
             report.append(
-                settings.sequence_dict["sequence"][i * lineLen : (i + 1) * lineLen]
+                context.sequence_dict["sequence"][i * lineLen : (i + 1) * lineLen]
                 + "- 3'"
             )
         else:
             report.append(
-                settings.sequence_dict["sequence"][i * lineLen : (i + 1) * lineLen]
+                context.sequence_dict["sequence"][i * lineLen : (i + 1) * lineLen]
             )
     if remainder > 0:
-        report.append(settings.sequence_dict["sequence"][-remainder:] + "- 3'")
+        report.append(context.sequence_dict["sequence"][-remainder:] + "- 3'")
 
     report.append("________________________________")
     report.append("")
@@ -218,31 +375,31 @@ def generateOverviewReport():
     # Basic Needs Dict Overview
     report.append("Basic Run Settings Overview")
     report.append(
-        f"Sequence Input Method: {'Text File' if settings.basicNeedsDict['textFile(T)/CopyPasted(F)'] else 'Direct Input'}"
+        f"Sequence Input Method: {'Text File' if context.basicNeedsDict['textFile(T)/CopyPasted(F)'] else 'Direct Input'}"
     )
     report.append(
-        f"Input Type: {'cDNA' if settings.basicNeedsDict['cDNA(T)/mRNA(F)'] else 'mRNA'}"
+        f"Input Type: {'cDNA' if context.basicNeedsDict['cDNA(T)/mRNA(F)'] else 'mRNA'}"
     )
     report.append(
-        f"Min Length of siRNAs Generated: {settings.basicNeedsDict['minLengthChecked']}"
+        f"Min Length of siRNAs Generated: {context.basicNeedsDict['minLengthChecked']}"
     )
     report.append(
-        f"Max Length of siRNAs Generated: {settings.basicNeedsDict['maxLengthCHecked']}"
+        f"Max Length of siRNAs Generated: {context.basicNeedsDict['maxLengthCHecked']}"
     )
     report.append(
-        f"Run conducted with Default Parameters? {'Yes' if settings.basicNeedsDict['RunDefaultParam'] else 'No'}"
+        f"Run conducted with Default Parameters? {'Yes' if context.basicNeedsDict['RunDefaultParam'] else 'No'}"
     )
     report.append(
-        f"Save Settings for future use: {'Yes' if settings.basicNeedsDict['saveSettings'] else 'No'}"
+        f"Save Settings for future use: {'Yes' if context.basicNeedsDict['saveSettings'] else 'No'}"
     )
-    report.append(f"Output File Name: {settings.basicNeedsDict['OutputFileName']}")
+    report.append(f"Output File Name: {context.basicNeedsDict['OutputFileName']}")
     report.append("________________________________")
     report.append("")
 
     # Exclusionary Parameters
     report.append("Overview of Parameters causing siRNA exclusion")
     report.append("________________________________")
-    for param in settings.exclusionAndScoringDict:
+    for param in context.exclusionAndScoringDict:
         if param["exclusionary"]:
             opposite_val = not param["wantedVal"]
             report.append(
@@ -253,7 +410,7 @@ def generateOverviewReport():
 
     # Scoring Parameters for Non-Exclusionary Items
     report.append("Scoring Parameters")
-    for param in settings.exclusionAndScoringDict:
+    for param in context.exclusionAndScoringDict:
         if not param["exclusionary"]:
             score_info = f"{param['question']} Desired Answer: {param['wantedVal']}, Score if fullfilled: {param['scoreVal']}"
             report.append(score_info)
@@ -263,13 +420,13 @@ def generateOverviewReport():
     # Sequence Options Overview
     report.append("Sequence Options Overview")
     report.append(
-        f"How far from Start Codon to Search: {settings.sequenceOpt['howFarFromStartCodonInputSearch']} bases"
+        f"How far from Start Codon to Search: {context.sequenceOpt['howFarFromStartCodonInputSearch']} bases"
     )
     report.append(
-        f"How near to Stop Codon to Search: {settings.sequenceOpt['howFarFromStopCodonInputSearch']} bases"
+        f"How near to Stop Codon to Search: {context.sequenceOpt['howFarFromStopCodonInputSearch']} bases"
     )
     report.append(
-        f"Organisms for Off-Target Considerations: {', '.join(settings.sequenceOpt['OrganismForOffTargets']) if settings.sequenceOpt['OrganismForOffTargets'] else 'None'}"
+        f"Organisms for Off-Target Considerations: {', '.join(context.sequenceOpt['OrganismForOffTargets']) if context.sequenceOpt['OrganismForOffTargets'] else 'None'}"
     )
     report.append("________________________________")
 
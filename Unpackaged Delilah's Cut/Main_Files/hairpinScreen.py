@@ -0,0 +1,71 @@
+"""
+File contains the hairpin pre-screen used before folding siRNAs (see MRNA.foldTable)
+An siRNA can only fold if it holds a stem: two base pairs (Watson-Crick or GU) next to each other, or separated by a
+single unpaired base on one or both sides, closing a hairpin loop of at least 3 bases. Everything else stabilizing is made
+of such stems, so an siRNA without one folds to no pairs at all and is not sent to ViennaRNA.
+
+Every stem of the reverse compliment is found once, as the nearest stem end from each position, and a window holds a stem
+when the nearest end from any of its positions falls inside it.
+
+The screen is checked against real folds with settings.foldingOpt["hairpinScreen"] set to "verify".
+
+"""
+
+import numpy as np
+
+from Main_Files.sequenceFeatures import A, C, G, U
+
+# Whether two codes can pair, Watson-Crick and GU wobble
+CAN_PAIR = np.zeros((4, 4), dtype=bool)
+for first, second in ((A, U), (U, A), (G, C), (C, G), (G, U), (U, G)):
+    CAN_PAIR[first, second] = True
+
+MIN_HAIRPIN = 3
+# Unpaired bases allowed between the two pairs of a stem, on the 5' and 3' side
+STEM_GAPS = ((0, 0), (1, 0), (0, 1), (1, 1))
+
+
+class HairpinScreen:
+    def __init__(self, codes):
+        self.codes = codes
+        self.length = len(codes)
+        # stemEnd[p] is the nearest 3' end of a stem starting at p, or past the sequence if none
+        self.maxSpan = 0
+        self.stemEnd = np.full(self.length, np.iinfo(np.int64).max, dtype=np.int64)
+
+    def extendTo(self, maxSpan):
+        # Stems are only found up to the longest window asked about, then kept
+        # The shortest stem is two stacked pairs around the smallest hairpin
+        for span in range(max(self.maxSpan + 1, MIN_HAIRPIN + 3), maxSpan + 1):
+            starts = np.arange(self.length - span)
+            ends = starts + span
+            outerPairs = CAN_PAIR[self.codes[starts], self.codes[ends]]
+            for fivePrimeGap, threePrimeGap in STEM_GAPS:
+                innerStart = starts + 1 + fivePrimeGap
+                innerEnd = ends - 1 - threePrimeGap
+                if span - 3 - fivePrimeGap - threePrimeGap < MIN_HAIRPIN:
+                    continue
+                stems = outerPairs & CAN_PAIR[
+                    self.codes[innerStart], self.codes[innerEnd]
+                ]
+                self.stemEnd[starts[stems]] = np.minimum(
+                    self.stemEnd[starts[stems]], ends[stems]
+                )
+        self.maxSpan = max(self.maxSpan, maxSpan)
+
+    def mayFold(self, starts, lengths):
+        """
+        False for windows that can't hold a stem, and so fold to no base pairs.
+        """
+        if len(starts) == 0:
+            return np.zeros(0, dtype=bool)
+        self.extendTo(int(lengths.max()) - 1)
+
+        lastBase = starts + lengths - 1
+        nearestEnd = np.full(len(starts), np.iinfo(np.int64).max, dtype=np.int64)
+        for offset in range(int(lengths.max())):
+            inside = np.flatnonzero(offset < lengths)
+            nearestEnd[inside] = np.minimum(
+                nearestEnd[inside], self.stemEnd[starts[inside] + offset]
+            )
+        return nearestEnd <= lastBase
@@ -8,10 +8,13 @@ Run GUI to collect user settings and preferences
 
 After settings collected, launch additional thread to compute and evaluate siRNAs
 
-(During this process the preogram must launch two subprocess for RNA folding, which is why python is required for the machine on this version)
+(During this process the preogram must launch a folding subprocess, kept running until exit, for RNA folding, which is why python is required for the machine on this version)
 
 The backend thread then returns the results to the GUI
 
+To run designs without the GUI (scripts, machines without a display), see cli.py
+To check the GUI still starts fast, run startupBudget.py
+
 
 """
 
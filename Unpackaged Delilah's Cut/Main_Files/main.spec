@@ -9,8 +9,10 @@ project_dir = r"C:\\Users\\Gaming PC\\Desktop\\Delilah's Cut"
 datas = [
     (os.path.join(project_dir, 'Main_Files', 'MarkDownFiles', 'InformationPage.md'), 'MarkDownFiles'),
     (os.path.join(project_dir, 'Main_Files', 'MarkDownFiles', 'UsagePage.md'), 'MarkDownFiles'),
-    (os.path.join(project_dir, 'Main_Files', 'rnaFolding.py'), '.'),  # Include rnaFolding.py in the root of the bundle
     (os.path.join(project_dir, 'Main_Files', 'rnaBatchFolding.py'), '.'), 
+    (os.path.join(project_dir, 'Main_Files', 'rnaFoldingServer.py'), '.'),
+    (os.path.join(project_dir, 'Main_Files', 'rnaFoldCache.py'), '.'),
+    (os.path.join(project_dir, 'Main_Files', 'rnaFoldingProtocol.py'), '.'),
     ('Assets/Delilah\'s_Cut_Logo.png', 'Assets'),
     # Add other necessary data directories/files as needed
     # (os.path.join(project_dir, 'SomeOtherFolder', 'file.extension'), 'DestinationFolderInPackage')
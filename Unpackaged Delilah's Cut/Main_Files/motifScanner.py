@@ -0,0 +1,126 @@
+"""
+File contains the motif scanner used by the candidate table (see candidateTable.py)
+Instead of searching every siRNA window for every motif, the reverse compliment of the mRNA is scanned once with an
+Aho-Corasick automaton holding every motif of every group (settings.motifDict). Each hit is a start position on the transcript,
+and a window contains a motif exactly when a hit of that motif starts inside it and ends before the window does,
+which running totals of hit starts answer for all windows at once.
+
+Runs of nine G or C (siRNAObj.gcsInRow) are found the same way, from a running total of G/C bases.
+
+"""
+
+import numpy as np
+
+from Main_Files.sequenceFeatures import runningTotal
+
+
+class AhoCorasick:
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        # State 0 is the root, each state has its transitions, failure link and the patterns ending there
+        self.transitions = [{}]
+        self.failure = [0]
+        self.outputs = [[]]
+
+        for patternIndex, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                if char not in self.transitions[state]:
+                    self.transitions.append({})
+                    self.failure.append(0)
+                    self.outputs.append([])
+                    self.transitions[state][char] = len(self.transitions) - 1
+                state = self.transitions[state][char]
+            self.outputs[state].append(patternIndex)
+
+        # Breadth first, so every failure link points to a state that is already finished
+        queue = list(self.transitions[0].values())
+        while queue:
+            state = queue.pop(0)
+            for char, nextState in self.transitions[state].items():
+                queue.append(nextState)
+                fallback = self.failure[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.failure[fallback]
+                self.failure[nextState] = self.transitions[fallback].get(char, 0)
+                if self.failure[nextState] == nextState:
+                    self.failure[nextState] = 0
+                self.outputs[nextState] = (
+                    self.outputs[nextState] + self.outputs[self.failure[nextState]]
+                )
+
+    def scan(self, text):
+        """
+        Yields (start position, pattern index) for every occurrence of every pattern, overlapping ones included.
+        """
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self.transitions[state]:
+                state = self.failure[state]
+            state = self.transitions[state].get(char, 0)
+            for patternIndex in self.outputs[state]:
+                yield index - len(self.patterns[patternIndex]) + 1, patternIndex
+
+
+class MotifScanner:
+    def __init__(self, sequence, motifGroups):
+        """
+        motifGroups is a dict of property name -> list of motifs, a window has the property if it contains any of them.
+        """
+        self.sequenceLength = len(sequence)
+        self.motifGroups = {
+            name: [motif for motif in motifs if motif]
+            for name, motifs in motifGroups.items()
+        }
+
+        patterns = sorted(
+            {motif for motifs in self.motifGroups.values() for motif in motifs}
+        )
+        hitStarts = {pattern: [] for pattern in patterns}
+        if patterns:
+            automaton = AhoCorasick(patterns)
+            for start, patternIndex in automaton.scan(sequence):
+                hitStarts[patterns[patternIndex]].append(start)
+
+        # For each group, one running total of hit starts per motif length
+        self.hitTotals = {}
+        for name, motifs in self.motifGroups.items():
+            byLength = {}
+            for motif in motifs:
+                starts = byLength.setdefault(
+                    len(motif), np.zeros(self.sequenceLength, dtype=bool)
+                )
+                starts[hitStarts[motif]] = True
+            self.hitTotals[name] = {
+                length: runningTotal(starts) for length, starts in byLength.items()
+            }
+
+        # 9 G/C bases in a row starting at each position
+        isGC = np.frombuffer(sequence.encode("ascii"), dtype=np.uint8)
+        isGC = (isGC == ord("g")) | (isGC == ord("c"))
+        gcTotal = runningTotal(isGC)
+        runStarts = np.zeros(self.sequenceLength, dtype=bool)
+        if self.sequenceLength >= 9:
+            runStarts[: self.sequenceLength - 8] = (gcTotal[9:] - gcTotal[:-9]) == 9
+        self.gcRunTotal = runningTotal(runStarts)
+
+    def hasMotif(self, name, starts, lengths):
+        values = np.zeros(len(starts), dtype=bool)
+        for motifLength, total in self.hitTotals[name].items():
+            values |= self.hasHitWithin(total, starts, lengths, motifLength)
+        return values
+
+    def hasNineGCinRow(self, starts, lengths):  # siRNAObj.gcsInRow
+        # gcsInRow only notices a run once it reads the base after it, so the run must end before the window's last base,
+        # the same as a 10 base motif starting with the run
+        return self.hasHitWithin(self.gcRunTotal, starts, lengths, 10)
+
+    @staticmethod
+    def hasHitWithin(total, starts, lengths, motifLength):
+        # A hit starting at h fits when starts <= h <= starts + lengths - motifLength
+        values = np.zeros(len(starts), dtype=bool)
+        fits = np.flatnonzero(lengths >= motifLength)
+        first = starts[fits]
+        last = first + lengths[fits] - motifLength
+        values[fits] = total[last + 1] > total[first]
+        return values
@@ -0,0 +1,240 @@
+"""
+File contains the siRNA pipeline run by the GUI and the command line (see runDesign), from the windows of the mRNA to the top N siRNAs
+Each stage is a generator of CandidateTables (see candidateTable.py) fed by the one before it:
+    windows -> exclusions that don't need a fold -> folding -> remaining exclusions -> scoring -> top N (see topNSelector.py)
+Scored blocks also go to the weight sensitivity analysis when the run asks for one (see weightSensitivity.py).
+
+Streaming runs cut the windows into blocks of pipelineOpt["blockSize"] rows (see settings.py), and a block is through every stage
+before the next one is made, so no stage ever holds every candidate. That is the default for mRNAs of at least
+pipelineOpt["streamAboveLength"] bases. Shorter mRNAs go through as a single block.
+Both give the same top N, since TopNSelector's order doesn't depend on the order candidates arrive in.
+Each stage reports its progress through the run's context and stops there if the run was cancelled (see runContext.py).
+A run whose context follows the provisional top N (see RunContext.provisional) folds and scores its blocks in parts of
+pipelineOpt["provisionalBlockSize"] rows, and hands the top N so far to the context after each part.
+A run handed folds made ahead of time (see prefolding.py and designSession.py) starts from that table instead, and
+skips folding. A streaming run takes that table a block at a time too.
+
+"""
+
+import numpy as np
+
+import Main_Files.settings as settings
+from Main_Files.runContext import RunContext
+from Main_Files.candidateTable import CandidateTable
+from Main_Files.processing import MRNA
+from Main_Files.exclusion_and_scoring import (
+    basicExclusion,
+    preFoldExclusion,
+    scoreRNA,
+    topNRNAs,
+    generateRNAreports,
+    generateOverviewReport,
+)
+from Main_Files.topNSelector import TopNSelector
+from Main_Files.weightSensitivity import WeightSensitivity, generateSensitivityReport
+
+
+class SiRNAPipeline:
+    def __init__(
+        self,
+        mRNA,
+        minLength,
+        maxLength,
+        settingsList,
+        n,
+        streaming=None,
+        foldedTable=None,
+    ):
+        """
+        mRNA must already be set up (MRNA.getMRNA), n is how many of the top siRNAs to keep.
+        streaming of None picks by the length of the mRNA.
+        foldedTable is every window of mRNA folded ahead of time (PreparedFolds.forRun), used instead of making windows.
+        Blocks with rows that aren't folded yet still go through foldBlock.
+        """
+        self.mRNA = mRNA
+        self.context = mRNA.context
+        self.foldedTable = foldedTable
+        self.minLength = minLength
+        self.maxLength = maxLength
+        self.settingsList = settingsList
+
+        # Every window of the run, progress is reported against it
+        mRNALen = len(mRNA.sequence)
+        self.totalWindows = sum(
+            max(0, 1 + mRNALen - length) for length in range(minLength, maxLength + 1)
+        )
+        # Windows made before the block going through the stages now, and how many that block has
+        self.blockStart = 0
+        self.blockWindows = 0
+        # The same for the part of the block going through folding and scoring now (see blockParts)
+        self.partStart = 0
+        self.partWindows = 0
+
+        if streaming is None:
+            streaming = (
+                len(mRNA.sequence) >= mRNA.context.pipelineOpt["streamAboveLength"]
+            )
+        self.blockSize = mRNA.context.pipelineOpt["blockSize"] if streaming else None
+
+        # How many windows were made and how many each round of exclusions removed
+        self.windowCount = 0
+        self.preExcludedCount = 0
+        self.excludedCount = 0
+        self.selector = TopNSelector(n)
+        self.sensitivity = None
+        if mRNA.context.pipelineOpt["sensitivityMode"] != "off":
+            self.sensitivity = WeightSensitivity(settingsList, n, mRNA.context.pipelineOpt)
+
+    def windowBlocks(self):
+        if self.foldedTable is not None and self.blockSize is not None:
+            blocks = self.foldedTableBlocks()
+        elif self.foldedTable is not None:
+            blocks = [self.foldedTable]
+        elif self.blockSize is None:
+            blocks = [
+                CandidateTable.fromMRNA(self.mRNA, self.minLength, self.maxLength)
+            ]
+        else:
+            blocks = CandidateTable.blocksFromMRNA(
+                self.mRNA, self.minLength, self.maxLength, self.blockSize
+            )
+        for block in blocks:
+            self.context.checkCancelled()
+            self.blockStart = self.windowCount
+            self.blockWindows = len(block)
+            self.windowCount += len(block)
+            self.context.progress("windows", self.windowCount, self.totalWindows)
+            yield block
+
+    def foldedTableBlocks(self):
+        # The table handed to a streaming run goes through the stages in blocks as well, not as a whole
+        for first in range(0, len(self.foldedTable), self.blockSize):
+            yield self.foldedTable.subset(
+                np.arange(first, min(first + self.blockSize, len(self.foldedTable)))
+            )
+
+    def preFoldBlocks(self, blocks):
+        for block in blocks:
+            kept, removed = preFoldExclusion(block, self.settingsList)
+            self.preExcludedCount += len(removed)
+            yield kept
+
+    def blockParts(self, blocks):
+        # Blocks with folding left are cut into parts when the run follows the provisional top N, so it is updated often
+        partSize = self.context.pipelineOpt["provisionalBlockSize"]
+        for block in blocks:
+            if self.context.onProvisional is None or block.isFolded.all() or len(block) <= partSize:
+                self.partStart, self.partWindows = self.blockStart, self.blockWindows
+                yield block
+                continue
+            # Each part counts for the windows of the block in step with its rows
+            blockStart, blockWindows = self.blockStart, self.blockWindows
+            for first in range(0, len(block), partSize):
+                last = min(first + partSize, len(block))
+                self.partStart = blockStart + blockWindows * first // len(block)
+                self.partWindows = blockStart + blockWindows * last // len(block) - self.partStart
+                yield block.subset(np.arange(first, last))
+
+    def foldedBlocks(self, blocks):
+        for block in blocks:
+            if not block.isFolded.all():
+                self.context.progress("folding", self.partStart, self.totalWindows)
+                self.foldBlock(block)
+            self.context.progress("folding", self.partStart + self.partWindows, self.totalWindows)
+            yield block
+
+    def foldBlock(self, block):
+        self.mRNA.foldTable(block, self.reportFolding)
+
+    def reportFolding(self, folded, toFold):
+        # The part's windows count as done in step with its folds
+        done = self.partStart + self.partWindows * folded // max(toFold, 1)
+        self.context.progress("folding", done, self.totalWindows)
+
+    def excludedBlocks(self, blocks):
+        for block in blocks:
+            self.context.checkCancelled()
+            self.context.progress("exclusion", self.partStart + self.partWindows, self.totalWindows)
+            kept, removed = basicExclusion(block, self.settingsList)
+            self.excludedCount += len(removed)
+            yield kept
+
+    def scoredBlocks(self, blocks):
+        for block in blocks:
+            self.context.checkCancelled()
+            self.context.progress("scoring", self.partStart + self.partWindows, self.totalWindows)
+            yield scoreRNA(block, self.settingsList)
+
+    def run(self):
+        """
+        Runs every stage and returns the TopNSelector holding the top n siRNAs (see exclusion_and_scoring.topNRNAs).
+        """
+        blocks = self.windowBlocks()
+        blocks = self.preFoldBlocks(blocks)
+        blocks = self.blockParts(blocks)
+        blocks = self.foldedBlocks(blocks)
+        blocks = self.excludedBlocks(blocks)
+        for block in self.scoredBlocks(blocks):
+            self.selector.addTable(block)
+            if self.sensitivity is not None:
+                self.sensitivity.addTable(block)
+            self.context.provisional(self.selector, self.partStart + self.partWindows, self.totalWindows)
+        return self.selector
+
+
+def runDesign(context=None, prepared=None):
+    """
+    Runs a whole design, the way the GUI's run button does, with the settings and warnings of context (see runContext.py).
+    Without one, the run takes a copy of the global settings (see settings.py) as they are now.
+    prepared is PreparedFolds with the same foldKey as context (see prefolding.py), its folds are used instead of folding.
+    Returns the top siRNA Objects and the reports (the overview first, then one per siRNA).
+    """
+    if context is None:
+        context = RunContext.fromSettings()
+    basicNeedsDict = context.basicNeedsDict
+
+    foldedTable = None
+    if prepared is not None:
+        mRNA, foldedTable = prepared.forRun(context)
+    else:
+        # gets mRNA from user or specified source and returns string with just agcu lowercase
+        mRNA = MRNA(context=context)
+
+        # gets mRNA all set up with its attributes
+        mRNA.getMRNA()
+
+    # generates subsequences of REVERSE COMPLIMENT of input, excludes, folds and scores them, keeping only the top n
+    pipeline = SiRNAPipeline(
+        mRNA,
+        basicNeedsDict["minLengthChecked"],
+        basicNeedsDict["maxLengthCHecked"],
+        context.exclusionAndScoringDict,
+        basicNeedsDict["HowManyRNAOutput"],
+        foldedTable=foldedTable,
+    )
+    selector = pipeline.run()
+    return finishDesign(context, selector, pipeline.sensitivity)
+
+
+def finishDesign(context, selector, sensitivity=None):
+    """
+    Last steps of a run, from the TopNSelector of its pipeline to the top siRNA Objects and the reports.
+    sensitivity is the pipeline's WeightSensitivity, its report comes after the siRNA reports.
+    """
+    basicNeedsDict = context.basicNeedsDict
+    context.checkCancelled()
+    context.progress("reporting")
+
+    # gets top n RNAs, highest to lowest score (see topNSelector.py)
+    topRNAs = topNRNAs(selector, basicNeedsDict["HowManyRNAOutput"], context)
+
+    # saves Settings file
+    if basicNeedsDict["saveSettings"] == True and basicNeedsDict["OutputFileName"] != "":
+        settings.saveDataJson(basicNeedsDict["OutputFileName"], context)
+
+    reports = [generateOverviewReport(context)]
+    reports.extend(generateRNAreports(topRNAs, context.exclusionAndScoringDict))
+    if sensitivity is not None:
+        context.sensitivity = sensitivity.analyze()
+        reports.append(generateSensitivityReport(context.sensitivity, topRNAs))
+    return topRNAs, reports
@@ -0,0 +1,192 @@
+"""
+File contains speculative folding, the expensive part of a run done in the background before the run is asked for
+The mRNA fold and the fold of every siRNA window only depend on the sequence, cDNA/mRNA, the length range and the
+folding options (see foldKey), never on the exclusion or scoring settings. So the GUI starts folding as soon as it knows
+those (see SpeculativeFolder), restarts when one of them changes, and the run picks the folds up instead of folding again
+(see pipeline.runDesign).
+
+Windows are folded a block of pipelineOpt["prefoldBlockSize"] at a time, so a cancelled job stops within one block and
+leaves the folding server free. A run waiting on a job (see SpeculativeFolder.take) follows its folding progress.
+
+"""
+
+import os
+import threading
+
+import numpy as np
+
+from Main_Files.candidateTable import CandidateTable
+from Main_Files.processing import MRNA, get_input_file_path, getFoldingServers
+
+# Seconds between checks for a cancelled run while it waits on a job (see SpeculativeFolder.take)
+CANCEL_POLL = 0.1
+# Folding options that change the folds, the others (workers, cache size...) only change how fast they come back
+FOLD_OPTIONS = (
+    "mRNAFolding",
+    "localAboveLength",
+    "localWindow",
+    "localMaxSpan",
+    "hairpinScreen",
+)
+
+
+def foldKey(context):
+    """
+    Everything the folds of a run depend on, runs with the same key have the same folds. None without a sequence.
+    """
+    basicNeedsDict = context.basicNeedsDict
+    if basicNeedsDict["textFile(T)/CopyPasted(F)"]:
+        fileName = context.sequence_dict["file_name"]
+        # An edited file has other folds, so its modification time is part of the key
+        modified = None
+        if fileName and os.path.exists(get_input_file_path(fileName)):
+            modified = os.path.getmtime(get_input_file_path(fileName))
+        source = ("file", fileName, modified)
+    else:
+        source = ("sequence", context.sequence_dict["sequence"])
+    if not source[1]:
+        return None
+    return (
+        source,
+        bool(basicNeedsDict["cDNA(T)/mRNA(F)"]),
+        basicNeedsDict["minLengthChecked"],
+        basicNeedsDict["maxLengthCHecked"],
+        tuple(context.foldingOpt[option] for option in FOLD_OPTIONS),
+    )
+
+
+class PreparedFolds:
+    def __init__(self, key, mRNA, table):
+        self.key = key
+        # mRNA set up and folded (MRNA.getMRNA), and every one of its windows with their folds
+        # A DesignSession's table only holds the folds its runs needed so far, the other rows are unfolded
+        self.mRNA = mRNA
+        self.table = table
+        # Warnings from setting up and folding (e.g. START CODON NOT FOUND), they belong to every run using these folds
+        self.warnings = list(mRNA.context.userWarnings)
+
+    def forRun(self, context):
+        """
+        Returns the mRNA and a fresh table of every window for the run of context, whose foldKey must match.
+        Runs may use the same PreparedFolds one after the other, not at the same time.
+        """
+        if context is not self.mRNA.context:
+            context.userWarnings.extend(self.warnings)
+            self.mRNA.useContext(context)
+        return self.mRNA, self.table.subset(np.arange(len(self.table)))
+
+
+def prepareFolds(context, cancelled=None):
+    """
+    Sets up and folds the mRNA of context and every siRNA window, returns PreparedFolds, or None if cancelled (an Event)
+    was set before it finished.
+    """
+    key = foldKey(context)
+    mRNA = MRNA(context=context)
+    mRNA.getMRNA()
+    table = CandidateTable.fromMRNA(
+        mRNA,
+        context.basicNeedsDict["minLengthChecked"],
+        context.basicNeedsDict["maxLengthCHecked"],
+    )
+
+    energies = np.zeros(len(table))
+    basePairs = np.zeros(len(table), dtype=np.int32)
+    blockSize = context.pipelineOpt["prefoldBlockSize"]
+    for first in range(0, len(table), blockSize):
+        if cancelled is not None and cancelled.is_set():
+            return None
+        block = table.subset(np.arange(first, min(first + blockSize, len(table))))
+        context.progress("folding", first, len(table))
+        mRNA.foldTable(
+            block,
+            lambda folded, toFold: context.progress(
+                "folding", first + len(block) * folded // max(toFold, 1), len(table)
+            ),
+        )
+        energies[first : first + len(block)] = block.mfe
+        basePairs[first : first + len(block)] = block.basePairsNum
+    if cancelled is not None and cancelled.is_set():
+        return None
+    table.setFolds(energies, basePairs)
+    return PreparedFolds(key, mRNA, table)
+
+
+class FoldJob:
+    # One prepareFolds running in its own thread
+    def __init__(self, context):
+        self.key = foldKey(context)
+        self.context = context
+        # The job's own folding requests stop with it (see processing.FoldingServerPool)
+        self.cancelled = context.cancelled
+        self.done = threading.Event()
+        self.prepared = None
+        self.error = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        try:
+            self.prepared = prepareFolds(self.context, self.cancelled)
+        except (Exception, SystemExit) as error:
+            # The run itself will meet the same problem and report it, the job just has nothing to hand over
+            self.error = error
+        finally:
+            self.done.set()
+
+
+class SpeculativeFolder:
+    """
+    Keeps at most one FoldJob, for the latest inputs it was given.
+    """
+
+    def __init__(self):
+        self.job = None
+        self.lock = threading.Lock()
+
+    def start(self, context):
+        """
+        Starts folding for context in the background, unless that is already running or done.
+        context must not be changed afterwards, give each call its own (see RunContext.fromSettings).
+        """
+        key = foldKey(context)
+        with self.lock:
+            if self.job is not None and self.job.key == key:
+                if self.job.error is None and not self.job.cancelled.is_set():
+                    return
+            self.cancelJob()
+            if key is None:
+                return
+            self.job = FoldJob(context)
+            self.job.thread.start()
+
+    def cancel(self):
+        with self.lock:
+            self.cancelJob()
+
+    def cancelJob(self):
+        if self.job is not None:
+            self.job.cancelled.set()
+            getFoldingServers().cancel(self.job.cancelled)
+            self.job = None
+
+    def take(self, context):
+        """
+        Returns the PreparedFolds for the run of context, waiting for them if they are still being made.
+        None when nothing was started for the same inputs, or it failed, the run then folds for itself.
+        Cancelling the run while it waits cancels the job too and raises RunCancelled.
+        """
+        key = foldKey(context)
+        with self.lock:
+            job = self.job
+            if job is None or key is None or job.key != key:
+                self.cancelJob()
+                return None
+            # The run waiting on the job is told how far its folding got (see RunContext.progress)
+            job.context.onProgress = context.onProgress
+        while not job.done.wait(CANCEL_POLL):
+            if context.cancelled.is_set():
+                with self.lock:
+                    if self.job is job:
+                        self.cancelJob()
+                context.checkCancelled()
+        return job.prepared
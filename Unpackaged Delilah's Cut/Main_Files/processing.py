@@ -5,11 +5,29 @@ Also handles the calling of subprocesses (one of the reasons for python installa
 
 """
 
-from Main_Files.siRNA import *
+from Main_Files.exclusion_and_scoring import preFoldExclusion
+from Main_Files.candidateTable import CandidateTable
+from Main_Files.sequenceFeatures import SequenceFeatures
+from Main_Files.motifScanner import MotifScanner
+from Main_Files.accessibilityIndex import AccessibilityIndex
+from Main_Files.hairpinScreen import HairpinScreen
+import numpy as np
 import os
 import sys
 import Main_Files.settings as settings
-import json
+from Main_Files.runContext import RunContext
+import Main_Files.rnaFoldingProtocol as protocol
+import subprocess
+import signal
+import threading
+import atexit
+
+# Folds between progress reports (and checks for a cancelled run) in MRNA.foldTable
+PROGRESS_ROWS = 256
+# Chunks sent to each of the folding server's workers per request (see FoldingServerPool.foldBatch)
+ROUND_CHUNKS_PER_WORKER = 4
+# Seconds a cancelled request's server gets to finish what it is folding before it is stopped (see FoldingServerPool.cancel)
+CANCEL_GRACE = 1
 
 
 class MRNA:
@@ -19,60 +37,79 @@ class MRNA:
         fivePrimePosOnGenome=None,
         threePrimePosOnGenome=None,
         organism=None,
+        context=None,
+    ):
+        # Settings of this run, and where its warnings go (see runContext.py)
+        self.context = context if context is not None else RunContext.fromSettings()
+
+    # Generates a table of all sequences (see candidateTable.py), siRNA Objects are only made later for the reported ones
+    # When given the exclusion settings, candidates failing a rule that doesn't need their fold are dropped before folding
+    # and kept in self.preExcludedsiRNAs, only the rest are folded and returned
+    def generatesiRNASeq(
+        self, minLength=20, maxLength=20, samp="Total", settingsList=None
     ):
-        pass
-
-    # Generates a list of all sequences as RNA Objects
-    def generatesiRNASeq(self, minLength=20, maxLength=20, samp="Total"):
 
-        mRNA = self.sequence
         if samp != "Total":
             # Case of when theres straight up too many sequences and need dif sampling method, implement later
             pass
 
-        revCompmRNA = self.reverseCompSeq
-        lengthList = [i for i in range(minLength, maxLength + 1)]
-        mRNALen = len(mRNA)
-
-        siRNADicts = []
+        # One row per window of the reverse compliment, see candidateTable.py
+        siRNATable = CandidateTable.fromMRNA(self, minLength, maxLength)
 
-        for length in lengthList:
-            for pos in range(1 + mRNALen - length):
-                siRNA = revCompmRNA[pos : pos + length]
-
-                threePrimePosOnmRNA = mRNALen - (pos + length - 1)
-                fivePrimePosOnmRNA = threePrimePosOnmRNA + length - 1
-
-                siRNADicts.append(
-                    {
-                        "sequence": siRNA,
-                        "threePrimePosOnmRNA": threePrimePosOnmRNA,
-                        "fivePrimePosOnmRNA": fivePrimePosOnmRNA,
-                        "struct": None,
-                        "energy": None,
-                    }
-                )
-
-        updatedsiRNADict = self.runSubprocess1(siRNADicts)
-        # Function that calls a subprocess to retrieve all the structures and adds them to the dictionary appropriately,
-
-        siRNAList = []
-        for item in updatedsiRNADict:
-            item["parentMRNA"] = self
-            siRNAList.append(
-                siRNAObj(
-                    item["sequence"],
-                    item["threePrimePosOnmRNA"],
-                    item["fivePrimePosOnmRNA"],
-                    parentMRNA=item["parentMRNA"],
-                    energy=item["energy"],
-                    structure=item["struct"],
-                )
+        self.preExcludedsiRNAs = siRNATable.subset([])
+        if settingsList is not None:
+            siRNATable, self.preExcludedsiRNAs = preFoldExclusion(
+                siRNATable, settingsList
             )
 
-        self.siRNAlist = siRNAList
+        self.foldTable(siRNATable)
+
+        self.siRNAlist = siRNATable
+
+        return siRNATable
+
+    # Folds every siRNA of a CandidateTable, also used by the streaming pipeline (see pipeline.py) one block at a time
+    # onFolded(folded, toFold) is called every PROGRESS_ROWS folds, which is also when a cancelled run stops
+    def foldTable(self, siRNATable, onFolded=None):
+        screenMode = self.context.foldingOpt["hairpinScreen"]
+        mayFold = np.ones(len(siRNATable), dtype=bool)
+        if screenMode != "off":
+            mayFold = self.hairpinScreen.mayFold(siRNATable.starts, siRNATable.lengths)
+
+        # siRNAs that can't hold a stem fold to the open chain, no pairs and 0 energy
+        energies = np.zeros(len(siRNATable))
+        basePairs = np.zeros(len(siRNATable), dtype=np.int32)
+        foldRows = np.flatnonzero(mayFold)
+        if screenMode == "verify":
+            foldRows = np.arange(len(siRNATable))
+
+        # Folds stream back from the folding server in order and are written straight into the table's columns
+        folds = self.runSubprocess1(siRNATable.sequences(foldRows))
+        try:
+            for folded, (row, (energy, pairs)) in enumerate(zip(foldRows.tolist(), folds), 1):
+                energies[row] = energy
+                basePairs[row] = pairs
+                if folded % PROGRESS_ROWS == 0:
+                    self.context.checkCancelled()
+                    if onFolded is not None:
+                        onFolded(folded, len(foldRows))
+        except RuntimeError:
+            # A cancelled batch ends between rounds, or its server is stopped (see FoldingServerPool.cancel)
+            self.context.checkCancelled()
+            raise
+        finally:
+            folds.close()
+        self.context.checkCancelled()
+
+        if screenMode == "verify":
+            missed = int(np.count_nonzero(~mayFold & (basePairs > 0)))
+            if missed:
+                self.context.warn(
+                    f"Hairpin pre-screen marked {missed} folding siRNAs as unfolded, their real folds were used"
+                )
 
-        return siRNAList
+        siRNATable.setFolds(energies, basePairs)
+        return siRNATable
 
     # Returns reverse compliment of RNA also 5' to 3', called by generatesiRNAseq
     def revComp(self):
@@ -96,18 +133,20 @@ class MRNA:
 
     def findStartCodon(self):
         mRNA = self.sequence
+        self.startCodonFound = True
         for i in range(len(mRNA)):
             if mRNA[i : i + 3] == "aug":
                 return i + 1
-        settings.userWarnings.append(
+        self.startCodonFound = False
+        self.context.warn(
             "START CODON NOT FOUND, POSITION SET AT FIRST BASE"
         )
         return 1
 
     def findStopCodon(self):
         mRNA = self.sequence
-        if "START CODON NOT FOUND, POSITION SET AT FIRST BASE" in settings.userWarnings:
-            settings.userWarnings.append(
+        if not self.startCodonFound:
+            self.context.warn(
                 "STOP CODON NOT FOUND, POSITION SET AT LAST SPOT"
             )
             return len(mRNA) - 4
@@ -120,20 +159,21 @@ class MRNA:
             if codon == "uaa" or codon == "uag" or codon == "uga":
                 return startCodonIndex + (3 * i) + 1
 
-        settings.userWarnings.append("STOP CODON NOT FOUND, POSITION SET AT LAST SPOT")
+        self.context.warn("STOP CODON NOT FOUND, POSITION SET AT LAST SPOT")
         return len(mRNA) - 4
 
     # Function that intializes mRNA seq either through input or TXT file, and also calls relevant functions to generate qualities
 
     def getMRNA(self):
+        self.context.progress("parse")
 
-        if not settings.basicNeedsDict[
+        if not self.context.basicNeedsDict[
             "textFile(T)/CopyPasted(F)"
         ]:  # Checks if sequence was copy-pasted or needs to run text file
-            mRNA = settings.sequence_dict["sequence"]
+            mRNA = self.context.sequence_dict["sequence"]
         else:
             try:
-                f = settings.sequence_dict["file_name"]
+                f = self.context.sequence_dict["file_name"]
 
                 path = get_input_file_path(f)
 
@@ -145,24 +185,41 @@ class MRNA:
 
         self.inputtedSequence = mRNA
 
-        if settings.basicNeedsDict["cDNA(T)/mRNA(F)"] == True:
+        if self.context.basicNeedsDict["cDNA(T)/mRNA(F)"] == True:
             mode = "cDNA"
         else:
             mode = "mRNA"
         mRNA = self.mRNAProcess(mode=mode)
 
         self.sequence = mRNA
-        settings.sequence_dict["sequence"] = mRNA
+        self.context.sequence_dict["sequence"] = mRNA
 
         self.sequenceLength = len(mRNA)
         self.reverseCompSeq = self.revComp()
+        # Encoded once, used for the sequence features of every siRNA window
+        self.sequenceFeatures = SequenceFeatures(self.reverseCompSeq)
+        # Scanned once for every motif of the run (settings.motifDict), used for the motif properties of every siRNA window
+        self.motifScanner = MotifScanner(self.reverseCompSeq, self.context.motifDict)
+        # Finds the siRNA windows that can't fold at all, so they skip the folding server
+        self.hairpinScreen = HairpinScreen(self.sequenceFeatures.codes)
+        self.context.checkCancelled()
+        self.context.progress("mRNAFold")
         self.struct = "set"
+        self.context.checkCancelled()
         # gives as absolute position of A within AUG, not the index
         self.startCodonPos = self.findStartCodon()
         self.stopCodonPos = self.findStopCodon()
         return
         # structure setter and getter
 
+    # Hands an mRNA that is already set up (see prefolding.py) to another run, only the settings of context that don't
+    # change the folds are taken up
+    def useContext(self, context):
+        if context.motifDict != self.context.motifDict:
+            self.motifScanner = MotifScanner(self.reverseCompSeq, context.motifDict)
+        self.context = context
+        context.sequence_dict["sequence"] = self.sequence
+
     @property
     def struct(self):
         return self._struct
@@ -172,70 +229,63 @@ class MRNA:
         self.runSubprocess()
 
     def runSubprocess(self):
-        if getattr(sys, "frozen", False):
-            # Get the correct path to rnaFolding.py in the frozen app
-            script_path = os.path.join(sys._MEIPASS, "rnaFolding.py")
-        else:
-            script_path = os.path.join(os.path.dirname(__file__), "rnaFolding.py")
-
-        # Use Popen to directly call the script
-        process = subprocess.Popen(
-            [
-                "python",
-                script_path,
-                self.sequence,
-            ],  # Use 'python' instead of sys.executable
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
-        output, error = process.communicate()
-
-        if error:
-            print(f"Error in RNA folding subprocess: {error.decode()}")
+        if self.usesLocalFolding():
+            self.runLocalFolding()
+            return
+        try:
+            struct, energy = getFoldingServers().foldMRNA(self.sequence, self.context.cancelled)
+        except RuntimeError as error:
+            # A cancelled run's server is stopped if it keeps folding (see FoldingServerPool.cancel)
+            self.context.checkCancelled()
+            print(f"Error in RNA folding subprocess: {error}")
         else:
-            struct, energy = output.decode().strip().split("|")
-            self._struct = struct
+            self.setFoldProfile(struct)
             self.mfe = round(float(energy), 2)
 
-    def runSubprocess1(self, siRNADicts):
-        if getattr(sys, "frozen", False):
-            # Get the correct path to rnaBatchFolding.py in the frozen app
-            script_path = os.path.join(sys._MEIPASS, "rnaBatchFolding.py")
-        else:
-            script_path = os.path.join(os.path.dirname(__file__), "rnaBatchFolding.py")
-
-        # Convert the siRNADicts list to a JSON string to pass it to the subprocess
-        input_data = json.dumps(siRNADicts)
-
-        # Call the subprocess and pass the input via stdin
-        process = subprocess.Popen(
-            [
-                "python",
-                script_path,
-            ],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+    def usesLocalFolding(self):
+        mode = self.context.foldingOpt["mRNAFolding"]
+        if mode == "auto":
+            return len(self.sequence) >= self.context.foldingOpt["localAboveLength"]
+        return mode == "local"
+
+    # Folds the mRNA in a sliding window instead of as a whole, for mRNAs too long to fold globally
+    def runLocalFolding(self):
+        window = self.context.foldingOpt["localWindow"]
+        maxSpan = self.context.foldingOpt["localMaxSpan"]
+        try:
+            unpaired = getFoldingServers().foldMRNALocal(
+                self.sequence, window, maxSpan, self.context.cancelled
+            )
+        except RuntimeError as error:
+            # A cancelled run's server is stopped if it keeps folding (see FoldingServerPool.cancel)
+            self.context.checkCancelled()
+            print(f"Error in RNA folding subprocess: {error}")
+            return
+
+        unpaired = np.asarray(unpaired, dtype=float)
+        # Bases more likely paired than not are marked "|" (paired, partner unknown), so the loose mRNA properties
+        # of the siRNAs read this profile the same way they read a dot bracket structure
+        self.setFoldProfile(
+            "".join(np.where(unpaired < 0.5, "|", ".").tolist()), unpaired
         )
+        # Local folding has no single structure, so no mfe for the whole mRNA
+        self.mfe = None
+        if self.context.foldingOpt["mRNAFolding"] == "auto":
+            self.context.warn(
+                f"mRNA is {len(self.sequence)} bases long, so it was folded locally (window of {window} bases, "
+                f"base pairs at most {maxSpan} apart) instead of as a whole"
+            )
 
-        # Send the JSON data to the subprocess and get the output path to the temp file
-        output, error = process.communicate(input=input_data.encode())
-
-        if error:
-            print(f"Error in RNA folding subprocess: {error.decode()}")
-            return None
-        else:
-            # Read the temp file path from the output
-            temp_file_path = output.decode().strip()
-
-            # Read the results from the temporary file
-            with open(temp_file_path, "r") as tmp_file:
-                updated_siRNADicts = json.load(tmp_file)
-
-            # Clean up the temporary file after reading
-            os.remove(temp_file_path)
+    def setFoldProfile(self, struct, unpairedProbabilities=None):
+        self._struct = struct
+        self.unpairedProbabilities = unpairedProbabilities
+        # Turned into running totals once, for the loose mRNA properties of every siRNA (see accessibilityIndex.py)
+        self.accessibilityIndex = AccessibilityIndex(struct, unpairedProbabilities)
 
-            return updated_siRNADicts
+    def runSubprocess1(self, sequences):
+        # Yields (energy, number of base pairs) for every sequence, in order, from the already running folding server
+        for chunk in getFoldingServers().foldBatch(sequences, self.context.cancelled):
+            yield from chunk
 
     # Gets rid of non-GACU chars and warns if theres too much garbage
     def mRNAProcess(self, mode="mRNA"):
@@ -251,7 +301,7 @@ class MRNA:
                 else:
                     removedChars += char
             if "t" in removedChars:
-                settings.userWarnings.append(
+                self.context.warn(
                     "mRNA Chosen, but sequence contained T, which was removed"
                 )
 
@@ -266,7 +316,7 @@ class MRNA:
                 else:
                     removedChars += char
             if "u" in removedChars:
-                settings.userWarnings.append(
+                self.context.warn(
                     "cDNA Chosen, but sequence contained U, which was removed"
                 )
 
@@ -294,3 +344,255 @@ def get_input_file_path(filename):
     """
     base_dir = get_base_dir()
     return os.path.join(base_dir, "Sequence_Inputs", filename)
+
+
+def get_fold_cache_path():
+    """
+    Returns the path to the fold cache in the 'Fold_Cache' directory.
+    """
+    base_dir = get_base_dir()
+    return os.path.join(base_dir, "Fold_Cache", "foldCache.sqlite")
+
+
+def get_script_path(scriptName):
+    """
+    Returns the path to one of the folding scripts, which are placed in the root of the bundle when packaged.
+    """
+    if getattr(sys, "frozen", False):
+        return os.path.join(sys._MEIPASS, scriptName)
+    return os.path.join(os.path.dirname(__file__), scriptName)
+
+
+class FoldingServer:
+    """
+    Client for rnaFoldingServer.py, a python process that is started once and then reused for every fold until exit.
+    ViennaRNA stays in its own process so it never shares an interpreter with PyQt6.
+    Messages are binary frames, see rnaFoldingProtocol.py.
+    Requests and responses are matched by order, so a server serves one request at a time, handed out by
+    FoldingServerPool.
+    """
+
+    def __init__(self):
+        self.process = None
+
+    def isRunning(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        self.process = subprocess.Popen(
+            [
+                "python",
+                get_script_path("rnaFoldingServer.py"),
+                "--workers",
+                str(settings.foldingOpt["workers"]),
+                "--chunk-size",
+                str(settings.foldingOpt["chunkSize"]),
+                "--cache",
+                get_fold_cache_path(),
+                "--cache-max-entries",
+                str(settings.foldingOpt["cacheMaxEntries"]),
+            ],  # Use 'python' instead of sys.executable
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            # Its own process group, so kill can stop the server and its workers together
+            start_new_session=os.name != "nt",
+        )
+
+    def send(self, frameType, payload=b""):
+        if not self.isRunning():
+            self.start()
+        try:
+            protocol.writeFrame(self.process.stdin, frameType, payload)
+            self.process.stdin.flush()
+        except OSError as error:
+            self.process = None
+            raise RuntimeError(f"Folding server stopped unexpectedly: {error}")
+
+    def receive(self):
+        frameType, payload = protocol.readFrame(self.process.stdout)
+        if frameType is None:
+            self.process = None
+            raise RuntimeError("Folding server stopped unexpectedly")
+        if frameType == protocol.ERROR:
+            raise RuntimeError(payload.decode("utf-8"))
+        return frameType, payload
+
+    def foldMRNA(self, sequence):
+        self.send(protocol.FOLD_MRNA, sequence.encode("ascii"))
+        frameType, payload = self.receive()
+        return protocol.decodeMRNAResult(payload)
+
+    def foldMRNALocal(self, sequence, window, maxSpan):
+        self.send(
+            protocol.FOLD_MRNA_LOCAL,
+            protocol.encodeLocalFoldRequest(sequence, window, maxSpan),
+        )
+        frameType, payload = self.receive()
+        return protocol.decodeUnpairedProbabilities(payload)
+
+    def foldRound(self, sequences):
+        self.send(protocol.FOLD_BATCH, protocol.encodeSequences(sequences))
+        chunks = []
+        # An error frame takes the place of BATCH_END, receive raises it
+        while True:
+            frameType, payload = self.receive()
+            if frameType == protocol.BATCH_END:
+                return chunks
+            chunks.append(protocol.decodeFoldResults(payload))
+
+    def kill(self):
+        # Stops the server and its worker processes at once, the request it was serving gets an error (see receive)
+        process = self.process
+        if process is not None and process.poll() is None:
+            killProcessTree(process)
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                pass
+
+    def close(self):
+        if self.isRunning():
+            try:
+                protocol.writeFrame(self.process.stdin, protocol.SHUTDOWN)
+                self.process.stdin.flush()
+                self.process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+        self.process = None
+
+
+class FoldingServerPool:
+    """
+    The folding servers of the whole process, shared by every run (GUI runs, design() calls from many threads...).
+    Each request takes a server to itself, an idle one if there is one, else a new one up to foldingOpt["servers"], else
+    it waits for one to be handed back. So concurrent runs fold side by side, and a single run never starts more than one.
+    Requests carry their run's cancelled Event, a cancelled run stops only its own requests (see cancel).
+    """
+
+    def __init__(self):
+        self.idle = []
+        # Server -> cancelled Event of the request it is serving
+        self.busy = {}
+        self.condition = threading.Condition()
+
+    def acquire(self, cancelled=None):
+        with self.condition:
+            while not self.idle and len(self.busy) >= max(1, settings.foldingOpt["servers"]):
+                checkRequestCancelled(cancelled)
+                self.condition.wait(0.1)
+            checkRequestCancelled(cancelled)
+            server = self.idle.pop() if self.idle else FoldingServer()
+            self.busy[server] = cancelled
+            return server
+
+    def release(self, server):
+        with self.condition:
+            self.busy.pop(server, None)
+            # A server that died with its request is dropped, the next request starts a fresh one
+            if server.isRunning():
+                self.idle.append(server)
+            self.condition.notify()
+
+    def foldMRNA(self, sequence, cancelled=None):
+        server = self.acquire(cancelled)
+        try:
+            return server.foldMRNA(sequence)
+        finally:
+            self.release(server)
+
+    def foldMRNALocal(self, sequence, window, maxSpan, cancelled=None):
+        server = self.acquire(cancelled)
+        try:
+            return server.foldMRNALocal(sequence, window, maxSpan)
+        finally:
+            self.release(server)
+
+    def foldBatch(self, sequences, cancelled=None):
+        """
+        Generator of lists of (energy, number of base pairs), one list per chunk, in input order.
+        Sequences are sent a round of roundSize() at a time, so what is sent and held doesn't grow with the batch. A round
+        is read to its end and its server handed back before its chunks are, so other runs fold between this one's
+        rounds, and a caller that stops reading early holds no server. Once cancelled is set no further round is sent.
+        """
+        roundSize = self.roundSize()
+        for first in range(0, len(sequences), roundSize):
+            server = self.acquire(cancelled)
+            try:
+                chunks = server.foldRound(sequences[first : first + roundSize])
+            finally:
+                self.release(server)
+            yield from chunks
+
+    def roundSize(self):
+        # Enough chunks to keep every worker of a server busy through a round
+        workers = settings.foldingOpt["workers"] or os.cpu_count() or 1
+        return settings.foldingOpt["chunkSize"] * max(1, workers) * ROUND_CHUNKS_PER_WORKER
+
+    def cancel(self, cancelled, grace=CANCEL_GRACE):
+        """
+        For a run whose cancelled Event was just set: its requests stop sending rounds, and a server still folding for
+        one of them grace seconds later (a long mRNA fold) is stopped, the next request starts a new server.
+        Servers serving other runs are left alone.
+        """
+        with self.condition:
+            self.condition.notify_all()
+        timer = threading.Timer(grace, self.stopServing, (cancelled,))
+        timer.daemon = True
+        timer.start()
+
+    def stopServing(self, cancelled):
+        # Killed under the lock, so a server can't be handed back and taken by another run in between
+        with self.condition:
+            for server, requestCancelled in list(self.busy.items()):
+                if requestCancelled is cancelled:
+                    server.kill()
+
+    def close(self):
+        with self.condition:
+            servers = self.idle + list(self.busy)
+            self.idle = []
+        for server in servers:
+            server.close()
+
+
+def checkRequestCancelled(cancelled):
+    if cancelled is not None and cancelled.is_set():
+        raise RuntimeError("Folding cancelled")
+
+
+def killProcessTree(process):
+    if os.name == "nt":
+        subprocess.run(
+            ["taskkill", "/F", "/T", "/PID", str(process.pid)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    else:
+        # The server leads its own process group (see FoldingServer.start), its pool workers are in it too
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+foldingServers = None
+foldingServersLock = threading.Lock()
+
+
+def getFoldingServers():
+    """
+    Returns the FoldingServerPool shared by the whole session, servers are started on first use and stopped on exit.
+    """
+    global foldingServers
+    with foldingServersLock:
+        if foldingServers is None:
+            foldingServers = FoldingServerPool()
+        return foldingServers
+
+
+def shutdownFoldingServers():
+    if foldingServers is not None:
+        foldingServers.close()
+
+
+atexit.register(shutdownFoldingServers)
@@ -0,0 +1,168 @@
+"""
+File contains the table model of the results screen (see MainWindow.createAndShowResultsScreen)
+One row per reported siRNA, sortable by every column. The view only asks for the rows it shows, and rows are handed to it
+FETCH_ROWS at a time as it scrolls, so the screen appears at once however many siRNAs were asked for. The report of an
+siRNA is only turned into text for the details pane when its row is picked (see reportHtml).
+The loading screen uses the same model for the provisional top N of a run still going, swapping in each newer one
+(see setSiRNAs).
+
+"""
+
+import html
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt6.QtGui import QColor, QFont
+
+# Rows handed to the view each time it scrolls near the end of the ones it has
+FETCH_ROWS = 200
+
+POSITIVE_COLOR = "#4CAF50"
+NEGATIVE_COLOR = "#F44336"
+NEUTRAL_COLOR = "#FFFFFF"
+
+
+def formatPercent(value):
+    return f"{100 * value:.0f}%"
+
+
+def formatMfe(value):
+    return f"{value:.2f}"
+
+
+class ResultsTableModel(QAbstractTableModel):
+    # Header, value of an siRNA Object (also what the column sorts by), how the value is shown
+    COLUMNS = [
+        ("Sequence (5' to 3')", lambda RNA: RNA.sequence, str),
+        ("Start Position", lambda RNA: RNA.threePrimeSpot, str),
+        ("Length", lambda RNA: RNA.length, str),
+        ("Score", lambda RNA: RNA.score, str),
+        ("GC Content", lambda RNA: RNA.GCPer, formatPercent),
+        ("MFE (kcal/mol)", lambda RNA: RNA.mfe, formatMfe),
+    ]
+
+    def __init__(self, siRNAs, sensitivity=None, parent=None):
+        """
+        siRNAs are the run's top siRNA Objects, best first. sensitivity is the run's SensitivityResult
+        (see weightSensitivity.py), which adds a column with the share of weight vectors keeping each siRNA in the top N.
+        """
+        super().__init__(parent)
+        self.siRNAs = siRNAs
+        self.columns = [("Rank", None, str)] + list(self.COLUMNS)
+        if sensitivity is not None:
+            self.columns.append(
+                (
+                    f"Top {sensitivity.n} Share",
+                    lambda RNA: sensitivity.topNShare(RNA.threePrimeSpot, RNA.length),
+                    formatPercent,
+                )
+            )
+        # Rank (index into siRNAs) shown on each row, changed by sorting
+        self.order = list(range(len(siRNAs)))
+        self.loadedRows = min(FETCH_ROWS, len(siRNAs))
+        # (column, order) of the last sort, kept when the siRNAs are swapped
+        self.sortedBy = None
+
+    def setSiRNAs(self, siRNAs):
+        # Shows siRNAs instead of the current ones, sorted the way the view was
+        self.beginResetModel()
+        self.siRNAs = siRNAs
+        self.order = list(range(len(siRNAs)))
+        if self.sortedBy is not None:
+            self.order = self.sortedOrder(*self.sortedBy)
+        self.loadedRows = min(FETCH_ROWS, len(siRNAs))
+        self.endResetModel()
+
+    def rankAt(self, row):
+        return self.order[row]
+
+    def value(self, rank, column):
+        getValue = self.columns[column][1]
+        if getValue is None:
+            return rank + 1
+        return getValue(self.siRNAs[rank])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loadedRows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self.loadedRows < len(self.siRNAs)
+
+    def fetchMore(self, parent):
+        if parent.isValid():
+            return
+        count = min(FETCH_ROWS, len(self.siRNAs) - self.loadedRows)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.loadedRows, self.loadedRows + count - 1)
+        self.loadedRows += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            formatValue = self.columns[column][2]
+            return formatValue(self.value(self.order[index.row()], column))
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            if column == 1:
+                return Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        if role == Qt.ItemDataRole.FontRole and column == 1:
+            return QFont("Courier New", 13)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.columns[section][0]
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return QColor("#FAD7A0")
+        return None
+
+    def sortedOrder(self, column, order):
+        # Sorted from the run's order, so equal values stay best first either way
+        return sorted(
+            range(len(self.siRNAs)),
+            key=lambda rank: self.value(rank, column),
+            reverse=order == Qt.SortOrder.DescendingOrder,
+        )
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        if column < 0 or column >= len(self.columns):
+            return
+        self.sortedBy = (column, order)
+        self.layoutAboutToBeChanged.emit()
+        oldIndexes = self.persistentIndexList()
+        oldRanks = [self.order[index.row()] for index in oldIndexes]
+        self.order = self.sortedOrder(column, order)
+        # The selected siRNA stays selected wherever it moved to, unless that row isn't loaded yet
+        rowOf = {rank: row for row, rank in enumerate(self.order)}
+        newIndexes = [
+            self.index(rowOf[rank], index.column())
+            if rowOf[rank] < self.loadedRows
+            else QModelIndex()
+            for rank, index in zip(oldRanks, oldIndexes)
+        ]
+        self.changePersistentIndexList(oldIndexes, newIndexes)
+        self.layoutChanged.emit()
+
+
+def reportHtml(reports):
+    """
+    Report lines (see exclusion_and_scoring.generateRNAreports) as HTML for the details pane, scoring lines colored by
+    whether they were positive or negative.
+    """
+    lines = []
+    for report in reports:
+        for line in report:
+            if "positive" in line.lower():
+                color = POSITIVE_COLOR
+            elif "negative" in line.lower():
+                color = NEGATIVE_COLOR
+            else:
+                color = NEUTRAL_COLOR
+            lines.append(f'<div style="color: {color};">{html.escape(line) or "&nbsp;"}</div>')
+    return "\n".join(lines)
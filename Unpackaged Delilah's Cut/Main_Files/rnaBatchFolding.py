@@ -1,15 +1,22 @@
 """
-File called as a subproccess to return the folding of a group of siRNAs
-Called like this because of incompatability of ViennaRNA and PyQT6 module upon packaging with pyinstaller, and no other workaround could be found.
+File with the folding of groups of siRNAs, used by the folding server (rnaFoldingServer.py)
+Runs outside the app because of incompatability of ViennaRNA and PyQT6 module upon packaging with pyinstaller, and no other workaround could be found.
 This file is one of two reasons for the python installation requirement of the machine.
 
+Large groups are split into chunks and folded on a pool of worker processes, results come back chunk by chunk in input order.
+When given a FoldCache (see rnaFoldCache.py), sequences already folded under the same ViennaRNA version and model settings are not folded again.
+
 """
 
-import sys
-import json
-import RNA as folding
-import tempfile
 import os
+import multiprocessing
+import RNA as folding
+
+from rnaFoldCache import FoldCache
+
+# A 19-23 nt siRNA folds in well under a millisecond, so chunks have to be large enough that
+# each task outweighs the cost of sending it to a worker, but small enough to keep every core busy
+DEFAULT_CHUNK_SIZE = 256
 
 
 def fold_rna(sequence):
@@ -18,26 +25,127 @@ def fold_rna(sequence):
     return struct, energy
 
 
-if __name__ == "__main__":
-    # Read the input JSON from stdin
-    input_data = json.loads(sys.stdin.read())
+def fold_local(sequence, window, maxSpan):
+    """
+    Probability of each base being unpaired, from partition functions over a window sliding along the sequence
+    with base pairs at most maxSpan apart (RNAplfold), so time and memory grow linearly with sequence length.
+    """
+    window = max(1, min(window, len(sequence)))
+    maxSpan = max(1, min(maxSpan, window))
+    # Indexed from 1, entry [i][1] is the probability that base i is unpaired
+    unpaired = folding.pfl_fold_up(sequence, 1, window, maxSpan)
+    return [unpaired[i][1] for i in range(1, len(sequence) + 1)]
+
 
-    # Prepare a list to store results
+def fold_chunk(sequences):
     results = []
+    for sequence in sequences:
+        struct, energy = fold_rna(sequence)
+        results.append((struct, round(float(energy), 2)))
+    return results
+
+
+def resolve_worker_count(workers):
+    # 0 or None means one worker per core
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, workers)
+
+
+def create_pool(workers):
+    workers = resolve_worker_count(workers)
+    if workers == 1:
+        return None
+    return multiprocessing.Pool(processes=workers)
+
+
+def iter_fold_batch(sequences, pool=None, chunkSize=DEFAULT_CHUNK_SIZE):
+    """
+    Folds every sequence and yields lists of (struct, energy), one per chunk, in the same order as the input.
+    """
+    chunks = [
+        sequences[i : i + chunkSize] for i in range(0, len(sequences), chunkSize)
+    ]
+
+    # Not worth the trip to the pool when everything fits in one chunk
+    if pool is None or len(chunks) <= 1:
+        for chunk in chunks:
+            yield fold_chunk(chunk)
+        return
+
+    # imap hands back chunks in submission order, so results line up with the input
+    for chunkResults in pool.imap(fold_chunk, chunks):
+        yield chunkResults
+
+
+def fold_batch(sequences, pool=None, chunkSize=DEFAULT_CHUNK_SIZE):
+    results = []
+    for chunkResults in iter_fold_batch(sequences, pool, chunkSize):
+        results.extend(chunkResults)
+    return results
+
+
+def model_signature():
+    """
+    Describes everything besides the sequence that changes a fold, used as part of the fold cache key.
+    """
+    md = folding.md()
+    return "|".join(
+        [
+            "ViennaRNA " + folding.__version__,
+            "T=" + str(md.temperature),
+            "dangles=" + str(md.dangles),
+            "noLP=" + str(md.noLP),
+            "noGU=" + str(md.noGU),
+            "noGUclosure=" + str(md.noGUclosure),
+            "special_hp=" + str(md.special_hp),
+            "gquad=" + str(md.gquad),
+            "energy_set=" + str(md.energy_set),
+        ]
+    )
+
+
+def iter_fold_batch_cached(
+    sequences, cache=None, pool=None, chunkSize=DEFAULT_CHUNK_SIZE
+):
+    """
+    Same as iter_fold_batch, but looks every sequence up in the cache first and only folds (once) the ones it is missing.
+    """
+    if cache is None:
+        yield from iter_fold_batch(sequences, pool, chunkSize)
+        return
+
+    known = cache.getMany(set(sequences))
+    # The same siRNA can show up more than once in a transcript, fold each missing sequence only once
+    missing = list(dict.fromkeys(seq for seq in sequences if seq not in known))
+    newFolds = iter_fold_batch(missing, pool, chunkSize)
+    foldedCount = 0
+
+    for start in range(0, len(sequences), chunkSize):
+        chunk = sequences[start : start + chunkSize]
+        for seq in chunk:
+            # Missing sequences are folded in order of first appearance, so pull chunks until this one is done
+            while seq not in known:
+                chunkResults = next(newFolds)
+                chunkSequences = missing[foldedCount : foldedCount + len(chunkResults)]
+                foldedCount += len(chunkResults)
+                cache.putMany(
+                    (s, struct, energy)
+                    for s, (struct, energy) in zip(chunkSequences, chunkResults)
+                )
+                known.update(zip(chunkSequences, chunkResults))
+        yield [known[seq] for seq in chunk]
+
+
+def fold_batch_cached(sequences, cache=None, pool=None, chunkSize=DEFAULT_CHUNK_SIZE):
+    results = []
+    for chunkResults in iter_fold_batch_cached(sequences, cache, pool, chunkSize):
+        results.extend(chunkResults)
+    return results
+
 
-    # Process each sequence
-    for item in input_data:
-        struct, energy = fold_rna(item["sequence"])
-        item["struct"] = struct
-        item["energy"] = round(float(energy), 2)
-        results.append(item)
-
-    # Write results to a temporary file
-    with tempfile.NamedTemporaryFile(
-        delete=False, mode="w", suffix=".json"
-    ) as tmp_file:
-        json.dump(results, tmp_file)
-        temp_file_path = tmp_file.name
-
-    # Output the path to the temporary file to stdout (so the main process can read it)
-    print(temp_file_path)
+def open_cache(path, maxEntries):
+    # A path of None or a cap of 0 turns the cache off
+    if not path or maxEntries <= 0:
+        return None
+    return FoldCache(path, model_signature(), maxEntries)
@@ -0,0 +1,134 @@
+"""
+File for the on disk cache of RNA folds, used by the folding server before anything is sent to ViennaRNA
+A sequence always folds the same way under the same ViennaRNA version and model settings, so every fold is stored under
+a hash of exactly those three things. Repeated runs against the same gene (or a gene family) then skip almost all folding.
+
+The cache is a single SQLite file capped at a maximum number of entries, the least recently used folds are evicted first.
+Several folding servers may share the file, so the entry count is kept in the file itself (table foldCount, updated by
+triggers) and the cap is checked against it in the same transaction as the insert.
+
+"""
+
+import sqlite3
+import hashlib
+import os
+
+# SQLite limits how many parameters a single query can take, lookups are split into groups of this size
+LOOKUP_GROUP_SIZE = 500
+
+# When the cap is hit, evict down to this fraction of it so eviction doesn't run after every batch
+EVICT_TO_FRACTION = 0.9
+
+
+class FoldCache:
+    def __init__(self, path, modelSignature, maxEntries=1000000):
+        self.modelSignature = modelSignature
+        self.maxEntries = maxEntries
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30)
+        # WAL lets several folding servers (e.g. batch runs) share the file
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        # Servers opening the file at the same time set it up one after the other
+        self.connection.execute("BEGIN IMMEDIATE")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS folds ("
+            "key BLOB PRIMARY KEY, struct TEXT NOT NULL, energy REAL NOT NULL, lastUsed INTEGER NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS foldsByLastUsed ON folds (lastUsed)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS foldCount (entries INTEGER NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE TRIGGER IF NOT EXISTS foldsCountInsert AFTER INSERT ON folds "
+            "BEGIN UPDATE foldCount SET entries = entries + 1; END"
+        )
+        self.connection.execute(
+            "CREATE TRIGGER IF NOT EXISTS foldsCountDelete AFTER DELETE ON folds "
+            "BEGIN UPDATE foldCount SET entries = entries - 1; END"
+        )
+        # Caches made before the count was kept start from their current size
+        if self.connection.execute("SELECT COUNT(*) FROM foldCount").fetchone()[0] == 0:
+            self.connection.execute("INSERT INTO foldCount (entries) SELECT COUNT(*) FROM folds")
+        self.connection.commit()
+
+        lastUsed = self.connection.execute(
+            "SELECT COALESCE(MAX(lastUsed), 0) FROM folds"
+        ).fetchone()[0]
+        # Monotonic use counter, bumped once per lookup or store, the smallest values are the least recently used
+        self.clock = lastUsed
+
+    def key(self, sequence):
+        return hashlib.sha1(
+            (self.modelSignature + "|" + sequence).encode()
+        ).digest()
+
+    def entryCount(self):
+        # Entries in the file, counting those stored by every other server sharing it
+        return self.connection.execute("SELECT entries FROM foldCount").fetchone()[0]
+
+    def tick(self):
+        self.clock += 1
+        return self.clock
+
+    def getMany(self, sequences):
+        """
+        Returns a dict of sequence -> (struct, energy) for every sequence already in the cache.
+        """
+        keyToSequence = {self.key(sequence): sequence for sequence in sequences}
+        keys = list(keyToSequence)
+        found = {}
+
+        for i in range(0, len(keys), LOOKUP_GROUP_SIZE):
+            group = keys[i : i + LOOKUP_GROUP_SIZE]
+            rows = self.connection.execute(
+                "SELECT key, struct, energy FROM folds WHERE key IN ("
+                + ",".join("?" * len(group))
+                + ")",
+                group,
+            ).fetchall()
+            for key, struct, energy in rows:
+                found[keyToSequence[key]] = (struct, energy)
+
+        if found:
+            now = self.tick()
+            self.connection.executemany(
+                "UPDATE folds SET lastUsed = ? WHERE key = ?",
+                [(now, self.key(sequence)) for sequence in found],
+            )
+            self.connection.commit()
+
+        return found
+
+    def putMany(self, folds):
+        """
+        Stores an iterable of (sequence, struct, energy) and evicts old entries if the cache grew past its cap.
+        """
+        now = self.tick()
+        rows = [
+            (self.key(sequence), struct, energy, now)
+            for sequence, struct, energy in folds
+        ]
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO folds (key, struct, energy, lastUsed) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+
+        # The insert holds the write lock until the commit, so no other server changes the count in between
+        entryCount = self.entryCount()
+        if entryCount > self.maxEntries:
+            self.evict(entryCount - int(self.maxEntries * EVICT_TO_FRACTION))
+
+        self.connection.commit()
+
+    def evict(self, count):
+        self.connection.execute(
+            "DELETE FROM folds WHERE key IN (SELECT key FROM folds ORDER BY lastUsed LIMIT ?)",
+            (count,),
+        )
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,106 @@
+"""
+File with the message format spoken between processing.py and the folding server (rnaFoldingServer.py)
+Imported by both sides, so it must never import ViennaRNA or PyQt6.
+
+Every message is a frame: a 1 byte frame type and a 4 byte payload length, followed by the payload.
+Only sequences are sent down, and only (energy, number of base pairs) comes back for each siRNA.
+Batch results are streamed back one chunk per frame, in input order, so they can be used as soon as they arrive.
+Long batches are sent as several FOLD_BATCH requests of a few chunks each (see processing.FoldingServer.foldBatch).
+Local folds of the mRNA send back the probability of each base being unpaired instead of a structure.
+
+"""
+
+import struct
+from array import array
+
+HEADER = struct.Struct("<BI")
+# energy (kcal/mol, rounded to 2 places) and number of base pairs of one folded siRNA
+FOLD_RECORD = struct.Struct("<dH")
+MRNA_ENERGY = struct.Struct("<d")
+BATCH_COUNT = struct.Struct("<I")
+# window size and maximum base pair span of a local fold
+LOCAL_FOLD_PARAMS = struct.Struct("<II")
+
+# Frame types, requests
+FOLD_MRNA = 1
+FOLD_BATCH = 2
+SHUTDOWN = 3
+FOLD_MRNA_LOCAL = 4
+
+# Frame types, responses
+MRNA_RESULT = 10
+BATCH_CHUNK = 11
+BATCH_END = 12
+ERROR = 13
+LOCAL_RESULT = 14
+
+
+def writeFrame(stream, frameType, payload=b""):
+    stream.write(HEADER.pack(frameType, len(payload)))
+    stream.write(payload)
+
+
+def readFrame(stream):
+    # Returns (None, None) once the other side has closed the pipe
+    header = stream.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None, None
+    frameType, length = HEADER.unpack(header)
+    payload = stream.read(length)
+    if len(payload) < length:
+        return None, None
+    return frameType, payload
+
+
+def encodeSequences(sequences):
+    return "\n".join(sequences).encode("ascii")
+
+
+def decodeSequences(payload):
+    if not payload:
+        return []
+    return payload.decode("ascii").split("\n")
+
+
+def encodeFoldResults(results):
+    return b"".join(FOLD_RECORD.pack(energy, pairs) for energy, pairs in results)
+
+
+def decodeFoldResults(payload):
+    return list(FOLD_RECORD.iter_unpack(payload))
+
+
+def encodeMRNAResult(structure, energy):
+    return MRNA_ENERGY.pack(energy) + structure.encode("ascii")
+
+
+def decodeMRNAResult(payload):
+    (energy,) = MRNA_ENERGY.unpack_from(payload)
+    return payload[MRNA_ENERGY.size :].decode("ascii"), energy
+
+
+def encodeLocalFoldRequest(sequence, window, maxSpan):
+    return LOCAL_FOLD_PARAMS.pack(window, maxSpan) + sequence.encode("ascii")
+
+
+def decodeLocalFoldRequest(payload):
+    window, maxSpan = LOCAL_FOLD_PARAMS.unpack_from(payload)
+    return payload[LOCAL_FOLD_PARAMS.size :].decode("ascii"), window, maxSpan
+
+
+def encodeUnpairedProbabilities(probabilities):
+    return array("d", probabilities).tobytes()
+
+
+def decodeUnpairedProbabilities(payload):
+    probabilities = array("d")
+    probabilities.frombytes(payload)
+    return probabilities
+
+
+def encodeBatchCount(count):
+    return BATCH_COUNT.pack(count)
+
+
+def decodeBatchCount(payload):
+    return BATCH_COUNT.unpack(payload)[0]
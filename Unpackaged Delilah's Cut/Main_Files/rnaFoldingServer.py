@@ -0,0 +1,102 @@
+"""
+File called as a single long-lived subprocess that handles every RNA folding request of a session
+Keeps one import of ViennaRNA (and its loaded energy parameters) warm, instead of starting a new python interpreter for each fold.
+Still runs in its own process because of the incompatability of ViennaRNA and PyQT6 module upon packaging with pyinstaller.
+
+Requests are read from stdin and answered on stdout as binary frames (see rnaFoldingProtocol.py):
+    FOLD_MRNA (sequence)        -> MRNA_RESULT (energy, structure)
+    FOLD_BATCH (sequences)      -> BATCH_CHUNK (energy, base pairs) ... BATCH_END (count)
+    FOLD_MRNA_LOCAL (window, max span, sequence) -> LOCAL_RESULT (probability each base is unpaired)
+    SHUTDOWN                    -> server exits
+Anything that goes wrong is answered with an ERROR frame instead.
+
+Batch folds are spread over a pool of worker processes (see rnaBatchFolding.py), created once with the server.
+Every fold is looked up in the on disk fold cache first (see rnaFoldCache.py).
+
+"""
+
+import sys
+import traceback
+import argparse
+
+import rnaFoldingProtocol as protocol
+from rnaBatchFolding import (
+    fold_batch_cached,
+    fold_local,
+    iter_fold_batch_cached,
+    create_pool,
+    open_cache,
+    DEFAULT_CHUNK_SIZE,
+)
+
+
+def handleRequest(
+    frameType, payload, outStream, pool=None, chunkSize=DEFAULT_CHUNK_SIZE, cache=None
+):
+    if frameType == protocol.FOLD_MRNA:
+        [(struct, energy)] = fold_batch_cached([payload.decode("ascii")], cache)
+        protocol.writeFrame(
+            outStream, protocol.MRNA_RESULT, protocol.encodeMRNAResult(struct, energy)
+        )
+
+    elif frameType == protocol.FOLD_MRNA_LOCAL:
+        sequence, window, maxSpan = protocol.decodeLocalFoldRequest(payload)
+        protocol.writeFrame(
+            outStream,
+            protocol.LOCAL_RESULT,
+            protocol.encodeUnpairedProbabilities(fold_local(sequence, window, maxSpan)),
+        )
+
+    elif frameType == protocol.FOLD_BATCH:
+        sequences = protocol.decodeSequences(payload)
+        # Each chunk is sent the moment it is folded, the structures themselves never leave this process
+        for chunkResults in iter_fold_batch_cached(sequences, cache, pool, chunkSize):
+            protocol.writeFrame(
+                outStream,
+                protocol.BATCH_CHUNK,
+                protocol.encodeFoldResults(
+                    (energy, struct.count("(")) for struct, energy in chunkResults
+                ),
+            )
+            outStream.flush()
+        protocol.writeFrame(
+            outStream, protocol.BATCH_END, protocol.encodeBatchCount(len(sequences))
+        )
+
+    else:
+        raise ValueError("Unknown frame type: " + str(frameType))
+
+
+def serve(inStream, outStream, pool=None, chunkSize=DEFAULT_CHUNK_SIZE, cache=None):
+    while True:
+        frameType, payload = protocol.readFrame(inStream)
+        if frameType is None or frameType == protocol.SHUTDOWN:
+            break
+
+        try:
+            handleRequest(frameType, payload, outStream, pool, chunkSize, cache)
+        except Exception:
+            protocol.writeFrame(
+                outStream, protocol.ERROR, traceback.format_exc().encode("utf-8")
+            )
+        outStream.flush()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--cache", default=None)
+    parser.add_argument("--cache-max-entries", type=int, default=1000000)
+    args = parser.parse_args()
+
+    pool = create_pool(args.workers)
+    cache = open_cache(args.cache, args.cache_max_entries)
+    try:
+        serve(sys.stdin.buffer, sys.stdout.buffer, pool, args.chunk_size, cache)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        if cache is not None:
+            cache.close()
@@ -0,0 +1,131 @@
+"""
+File contains the run context, everything one design reads and writes while it runs (see designApi.py)
+A run used to read its settings from, and write its warnings and counts to, the globals in settings.py, so only one run
+could happen at a time and the warnings of one run showed up in the next. Each run now gets its own RunContext: a copy of
+the settings taken when the run starts, plus the run's own warnings and counts.
+
+Attribute names match the globals in settings.py, so code reporting on a run can be handed either one.
+The folding server options stay global (settings.foldingOpt), the servers are shared by every run of the process
+(see processing.FoldingServerPool).
+
+Whoever started the run can follow it through onProgress (see progress) and onProvisional (see provisional), and stop it
+through cancelled: the run checks it between steps (see checkCancelled) and stops with RunCancelled.
+
+"""
+
+import copy
+import json
+import os
+import threading
+
+import Main_Files.settings as settings
+
+
+class RunCancelled(Exception):
+    # Raised inside a run once its context is cancelled, the run stops without results
+    pass
+
+
+class RunContext:
+    def __init__(
+        self,
+        basicNeedsDict,
+        sequence_dict,
+        exclusionAndScoringDict,
+        sequenceOpt,
+        motifDict,
+        foldingOpt,
+        pipelineOpt,
+    ):
+        self.basicNeedsDict = basicNeedsDict
+        self.sequence_dict = sequence_dict
+        self.exclusionAndScoringDict = exclusionAndScoringDict
+        self.sequenceOpt = sequenceOpt
+        self.motifDict = motifDict
+        self.foldingOpt = foldingOpt
+        self.pipelineOpt = pipelineOpt
+
+        # Written during the run
+        self.userWarnings = []
+        self.totalNonExcludedRNAs = 0
+        # SensitivityResult of the run, when pipelineOpt["sensitivityMode"] asks for one (see weightSensitivity.py)
+        self.sensitivity = None
+
+        # Set by whoever follows or stops the run (see GUI.BackendThread)
+        self.onProgress = None
+        self.onProvisional = None
+        self.cancelled = threading.Event()
+
+    @classmethod
+    def fromSettings(cls):
+        """
+        Copy of the global settings as they are now, later changes to them don't reach the run.
+        """
+        return cls(
+            *copy.deepcopy(
+                (
+                    settings.basicNeedsDict,
+                    settings.sequence_dict,
+                    settings.exclusionAndScoringDict,
+                    settings.sequenceOpt,
+                    settings.motifDict,
+                    settings.foldingOpt,
+                    settings.pipelineOpt,
+                )
+            )
+        )
+
+    @classmethod
+    def fromProfile(cls, profile=None):
+        """
+        profile is a settings file saved by the GUI (path or name within Saved_Settings), the dictionary held in one,
+        or None for the global settings as they are.
+        """
+        context = cls.fromSettings()
+        if profile is None:
+            return context
+        if isinstance(profile, dict):
+            data = copy.deepcopy(profile)
+        else:
+            path = profile
+            if not os.path.exists(path):
+                path = settings.get_settings_file_path(
+                    path if ".json" in path else path + ".json"
+                )
+            with open(path, "r") as json_file:
+                data = json.load(json_file)
+        context.applyProfile(data)
+        return context
+
+    def applyProfile(self, data):
+        # Same as settings.loadDataJson, for this run only
+        self.basicNeedsDict.update(data.get("basicNeedsDict", {}))
+        if "exclusionAndScoringDict" in data:
+            self.exclusionAndScoringDict[:] = data["exclusionAndScoringDict"]
+        self.sequenceOpt.update(data.get("sequenceOpt", {}))
+        for propName, motifs in data.get("motifDict", {}).items():
+            self.motifDict[propName] = settings.normalizeMotifs(motifs)
+
+    def warn(self, message):
+        self.userWarnings.append(message)
+
+    def progress(self, stage, done=None, total=None):
+        """
+        Tells onProgress which stage the run is in: "parse", "mRNAFold", "windows", "folding", "exclusion", "scoring" or
+        "reporting". done and total count siRNA windows where the stage has them, None otherwise.
+        Streaming runs (see pipeline.py) take each block through folding to scoring, so stages repeat as blocks go by.
+        """
+        if self.onProgress is not None:
+            self.onProgress(stage, done, total)
+
+    def provisional(self, selector, done, total):
+        """
+        Hands onProvisional the TopNSelector of the run once done of total siRNA windows are scored, its top N is what the
+        run would report if no other window made it. Called on the run's thread, the selector changes once it returns.
+        """
+        if self.onProvisional is not None:
+            self.onProvisional(selector, done, total)
+
+    def checkCancelled(self):
+        if self.cancelled.is_set():
+            raise RunCancelled()
@@ -0,0 +1,92 @@
+"""
+File contains the sequence feature engine used by the candidate table (see candidateTable.py)
+The reverse compliment of the mRNA is encoded once as a 2-bit code per base (a=0, c=1, g=2, u=3), plus running totals of
+G/C and A/U bases. Every window of every length is a (start, length) pair into it, so composition features become two lookups
+into the running totals and positional features a single lookup into the code array, for all windows at once.
+
+Each feature mirrors the siRNAObj function noted beside it and gives exactly the same values, rounding included.
+
+"""
+
+import functools
+import numpy as np
+
+A, C, G, U = 0, 1, 2, 3
+
+# ascii byte -> 2-bit code
+ENCODING = np.zeros(256, dtype=np.uint8)
+for char, code in (("a", A), ("c", C), ("g", G), ("u", U)):
+    ENCODING[ord(char)] = code
+
+
+def encodeSequence(sequence):
+    return ENCODING[np.frombuffer(sequence.encode("ascii"), dtype=np.uint8)]
+
+
+def runningTotal(mask):
+    # total[i] is how many of the first i bases match, so a window's count is total[end] - total[start]
+    total = np.zeros(len(mask) + 1, dtype=np.int32)
+    np.cumsum(mask, out=total[1:])
+    return total
+
+
+class SequenceFeatures:
+    def __init__(self, sequence):
+        self.sequence = sequence
+        self.codes = encodeSequence(sequence)
+        self.gcTotal = runningTotal((self.codes == C) | (self.codes == G))
+        self.auTotal = runningTotal((self.codes == A) | (self.codes == U))
+
+    def gcCount(self, starts, lengths):
+        return self.gcTotal[starts + lengths] - self.gcTotal[starts]
+
+    def baseAt(self, starts, lengths, position):
+        """
+        Code of the base at a (0 based) position of every window, negative positions count from the end.
+        Windows too short to have that position get 255, which matches no base.
+        """
+        index = starts + position if position >= 0 else starts + lengths + position
+        present = lengths > position if position >= 0 else lengths >= -position
+        bases = np.full(len(starts), 255, dtype=np.uint8)
+        bases[present] = self.codes[index[present]]
+        return bases
+
+    def hasBaseAt(self, starts, lengths, position, bases):
+        found = self.baseAt(starts, lengths, position)
+        return np.isin(found, bases)
+
+    def GCPer(self, starts, lengths):  # siRNAObj.GCcontent
+        # Rounded with python's round for every (count, length) pair that can occur, then looked up
+        roundedTable = roundedFractionTable(int(lengths.max(initial=1)))
+        return roundedTable[lengths, self.gcCount(starts, lengths)]
+
+    def selectiveLoading(self, starts, lengths):  # siRNAObj.fivePrimeLooseness
+        # +1 for each A/U in the first three bases and each G/C in the last three, -1 for any other base there
+        edge = np.minimum(lengths, 3)
+        unstableStart = self.auTotal[starts + edge] - self.auTotal[starts]
+        ends = starts + lengths
+        stableEnd = self.gcTotal[ends] - self.gcTotal[ends - edge]
+        score = (2 * unstableStart - edge) + (2 * stableEnd - edge)
+        return LOADING_SCORES[score + 6]
+
+    def lowGCNineFourteen(self, starts, lengths):  # siRNAObj.lowGCinNinetoFourteen
+        values = np.zeros(len(starts), dtype=bool)
+        # bases 9 through 14 are indexes 8 to 13, only windows of 15 or more count
+        longEnough = np.flatnonzero(lengths >= 15)
+        regionStarts = starts[longEnough] + 8
+        gcs = self.gcTotal[regionStarts + 6] - self.gcTotal[regionStarts]
+        values[longEnough] = gcs / 6 < 0.5
+        return values
+
+
+@functools.lru_cache(maxsize=None)
+def roundedFractionTable(maxLength):
+    table = np.zeros((maxLength + 1, maxLength + 1))
+    for length in range(1, maxLength + 1):
+        for count in range(length + 1):
+            table[length, count] = round(count / length, 2)
+    return table
+
+
+# round(score / 6, 2) for every selective loading score from -6 to 6
+LOADING_SCORES = np.array([round(score / 6, 2) for score in range(-6, 7)])
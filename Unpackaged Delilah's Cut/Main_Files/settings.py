@@ -168,6 +168,26 @@ exclusionAndScoringDict = [
 ]
 
 
+# Motifs searched for in every siRNA, the siRNA has the property if it contains any motif in its list
+# Saved with the rest of the settings, so custom motif lists can be loaded from Saved_Settings
+motifDict = {
+    "hasCytoMotif": ["uggc"],
+    "hasImmuneMotif": ["guccuucaa", "ugugu"],
+    "hasGGG": ["ggg"],
+    "hasCCC": ["ccc"],
+}
+
+
+def normalizeMotifs(motifs):
+    # Motifs may be saved as DNA or in capitals, siRNAs are lowercase RNA
+    return [motif.strip().lower().replace("t", "u") for motif in motifs]
+
+
+def updateMotifDict(newMotifDict):
+    for propName, motifs in newMotifDict.items():
+        motifDict[propName] = normalizeMotifs(motifs)
+
+
 sequenceOpt = {
     "sequenceInp": None,
     "howFarFromStartCodonInputSearch": 75,
@@ -175,8 +195,53 @@ sequenceOpt = {
     "OrganismForOffTargets": [],
 }
 
+# Runs on mRNAs of at least streamAboveLength bases go through the pipeline in blocks of at most blockSize siRNAs
+# instead of all at once (see pipeline.py), so memory stays flat however long the mRNA is
+# prefoldBlockSize is how many siRNAs background folding sends at a time, cancelling it waits for at most one block
+# (see prefolding.py)
+# provisionalBlockSize is how many siRNAs the GUI's runs fold and score between updates of the provisional top N it shows
+# (see RunContext.provisional)
+# sensitivityMode "sampled" or "grid" also ranks the non excluded siRNAs under many other scoring weights and reports how
+# often each makes the top N (see weightSensitivity.py), "off" skips it. "sampled" scales every weight by its own random
+# factor within 1 +/- sensitivitySpread, sensitivitySamples times, "grid" tries every combination of the weights scaled
+# by sensitivityGridFactors, refused when that is over sensitivityMaxVectors vectors
+pipelineOpt = {
+    "streamAboveLength": 10000,
+    "blockSize": 50000,
+    "prefoldBlockSize": 5000,
+    "provisionalBlockSize": 2000,
+    "sensitivityMode": "off",
+    "sensitivitySamples": 2000,
+    "sensitivitySpread": 0.5,
+    "sensitivitySeed": 0,
+    "sensitivityGridFactors": [0.5, 1.0, 1.5],
+    "sensitivityMaxVectors": 250000,
+}
+
+# Folding server options, workers of 0 uses every core, chunkSize is how many siRNAs each worker folds per task
+# servers is how many folding servers concurrent runs (e.g. design() from several threads) may use at once, each with
+# its own workers, a single run only ever uses one
+# cacheMaxEntries caps the on disk fold cache (least recently used folds are dropped first), 0 turns the cache off
+# hairpinScreen "on" skips folding siRNAs that can't hold a stem (see hairpinScreen.py), "verify" folds them anyway and
+# warns if any of them had base pairs, "off" folds everything
+# mRNAFolding is "global" (one MFE structure for the whole mRNA), "local" (sliding window of localWindow bases,
+# base pairs at most localMaxSpan apart, grows linearly with length) or "auto" (local from localAboveLength bases up)
+foldingOpt = {
+    "workers": 0,
+    "servers": 2,
+    "chunkSize": 256,
+    "cacheMaxEntries": 1000000,
+    "hairpinScreen": "on",
+    "mRNAFolding": "auto",
+    "localAboveLength": 5000,
+    "localWindow": 80,
+    "localMaxSpan": 40,
+}
+
 
-def saveDataJson(fileName):
+def saveDataJson(fileName, context=None):
+    # context is a run's RunContext (see runContext.py), its settings are saved instead of the ones above
+    source = context if context is not None else sys.modules[__name__]
     if "." not in fileName:
         fileName += ".json"
 
@@ -187,16 +252,30 @@ def saveDataJson(fileName):
     os.makedirs(os.path.dirname(path), exist_ok=True)
 
     data = {
-        "basicNeedsDict": basicNeedsDict,
-        "sequence_dict": sequence_dict,
-        "exclusionAndScoringDict": exclusionAndScoringDict,
-        "sequenceOpt": sequenceOpt,
+        "basicNeedsDict": source.basicNeedsDict,
+        "sequence_dict": source.sequence_dict,
+        "exclusionAndScoringDict": source.exclusionAndScoringDict,
+        "sequenceOpt": source.sequenceOpt,
+        "motifDict": source.motifDict,
     }
 
     with open(path, "w") as json_file:
         json.dump(data, json_file, indent=4)
 
 
+def loadDataJson(path):
+    # Reverse of saveDataJson, for settings files read outside the GUI (see cli.py)
+    with open(path, "r") as json_file:
+        data = json.load(json_file)
+
+    basicNeedsDict.update(data.get("basicNeedsDict", {}))
+    if "exclusionAndScoringDict" in data:
+        exclusionAndScoringDict[:] = data["exclusionAndScoringDict"]
+    sequenceOpt.update(data.get("sequenceOpt", {}))
+    updateMotifDict(data.get("motifDict", {}))
+    return data
+
+
 def get_base_dir():
     """
     Returns the base directory of the executable. This will be the directory
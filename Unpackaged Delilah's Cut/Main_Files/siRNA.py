@@ -3,7 +3,8 @@ siRNA file contains the siRNA object and the functions for evaluating its score
 ex: Is there an A or U in postition 1?
 
 
-In order to add a new function, all you need to do is Create a function to evaluate the quality, and then add that property into the settings.py file dictionary "exclusionAndScoringDict".
+In order to add a new function, all you need to do is Create a function to evaluate the quality, add the property it sets and the function's name to "lazyProperties",
+ and then add that property into the settings.py file dictionary "exclusionAndScoringDict".
  The program will handle everything else including implimentation to GUI
 
 
@@ -16,6 +17,40 @@ import os
 import sys
 import Main_Files.settings as settings
 
+# Properties that need the siRNA's own fold, every other property only needs its sequence, position and the parent mRNA,
+# so exclusions on those can run before any siRNA is sent to ViennaRNA
+foldDependentProps = {"isAllUnfolded"}
+
+# Property -> the function that sets it, run on first access instead of in __init__
+lazyProperties = {
+    "GCPer": "GCcontent",
+    # -1 to 1 values, positive is favored
+    "selectiveLoading": "fivePrimeLooseness",
+    # Boolean attributes, positve
+    "hasUInPosOne": "startWithU",
+    "hasUOrAInPosOne": "startWithUorA",
+    "hasGOrCInLastPos": "endsWithGOrC",
+    "GCWithinRange": "GCInRange",
+    "isPreferablyLoaded": "isPrefLoaded",
+    "withinmRNARange": "withinMRNARange",
+    "loosemRNARegion": "withinLooseMRNARegion",
+    "fivePrimeLoosemRNA": "fivePrimeEndOnLoosemRNA",
+    "threePrimeLoosemRNA": "threePrimeEndOnLoosemRNA",
+    "accessibility": "targetAccessibility",
+    "lowGCNineFourteen": "lowGCinNinetoFourteen",
+    # Additional Positional Params, Positive
+    "hasAInTen": "AInTen",
+    "hasUInSixteen": "UInSixteen",
+    # Boolean attributes, negative
+    "hasCytoMotif": "cytoMotif",
+    "hasImmuneMotif": "immuneMotif",
+    "hasNineGCinRow": "gcsInRow",
+    "hasGGG": "hasGGGseq",
+    "hasCCC": "hasCCCseq",
+    # Additional Positional Params, Negative
+    "hasCInSeven": "CInSeven",
+}
+
 # RNA Class, containing all information about the RNA
 
 
@@ -28,6 +63,7 @@ class siRNAObj:
         parentMRNA=None,
         energy=None,
         structure=None,
+        basePairsNum=None,
     ):
         # Initialization of RNA
         self.parentMRNA = parentMRNA
@@ -44,41 +80,8 @@ class siRNAObj:
         self.threePrimeSpot = threePrimemRNAPos
         self.fivePrimeSpot = fivePrimemRNAPos
 
-        self.GCcontent()  # see self.GCPer
-        self.basePairs()  # see self.basePairsNum
-
-        # -1 to 1 values, positive is favored
-        self.fivePrimeLooseness()  # see self.selectiveLoading
-
-        # Boolean attributes, positve
-        self.isUnfolded()  # see self.isAllUnfolded
-        self.startWithU()  # see self.hasUInPosOne
-        self.startWithUorA()  # see self.hasUOrAInPosOne
-        self.endsWithGOrC()  # see self.hasGOrCInLastPos
-        self.GCInRange()  # see self.GCWithinRange
-
-        self.isPrefLoaded()  # see self.isPreferablyLoaded
-
-        self.withinMRNARange()  # see self.withinmRNARange
-        self.withinLooseMRNARegion()  # see self.loosemRNARegion
-        self.fivePrimeEndOnLoosemRNA()  # see self.fivePrimeLoosemRNA
-        self.threePrimeEndOnLoosemRNA()  # see self.threePrimeLoosemRNA
-        self.lowGCinNinetoFourteen()  # see self.lowGCNineFourteen
-
-        # Additional Positional Params, Positive
-        self.AInTen()  # see self.hasAInTen
-        self.UInSixteen()  # see self.hasUInSixteen
-
-        # Boolean attributes, negative
-        self.cytoMotif()  # see self.hasCytoMotif
-        self.immuneMotif()  # see self.hasImmuneMotif
-        self.gcsInRow()  # see self.hasNineGCinRow
-
-        self.hasGGGseq()  # see self.hasGGG
-        self.hasCCCseq()  # see self.hasCCC
-
-        # Additional Positional Params, Negative
-        self.CInSeven()  # see self.hasCInSeven
+        # Every property in lazyProperties is computed the first time it is read, then kept (see __getattr__)
+        # so a run only pays for the properties its settings, reports and overview actually use
 
         # list of reasons that siRNA was excluded from dataset
         self.isExcluded = False
@@ -87,6 +90,35 @@ class siRNAObj:
         # Score of siRNA 0-100
         self.score = None
 
+        # Fold dependent attributes, left unset until folded (see foldDependentProps)
+        self.isFolded = False
+        if structure is not None or basePairsNum is not None:
+            self.setFold(energy, structure=structure, basePairsNum=basePairsNum)
+
+    def __getattr__(self, name):
+        # Only reached for attributes that aren't set yet
+        methodName = lazyProperties.get(name)
+        if methodName is None:
+            raise AttributeError(f"'siRNAObj' object has no attribute '{name}'")
+        getattr(self, methodName)()
+        return self.__dict__[name]
+
+    def runContext(self):
+        # Settings of the run the siRNA came from (see runContext.py), the global ones without a parent mRNA
+        if self.parentMRNA is None:
+            return settings
+        return self.parentMRNA.context
+
+    def setFold(self, energy, structure=None, basePairsNum=None):
+        self.struct = structure
+        self.mfe = energy
+        # The folding server only sends back the number of base pairs, not the structure itself
+        self.basePairsNum = basePairsNum
+        self.isFolded = True
+
+        self.basePairs()  # see self.basePairsNum
+        self.isUnfolded()  # see self.isAllUnfolded
+
     def CInSeven(self):
         value = False
         if len(self.sequence) < 7:
@@ -119,14 +151,16 @@ class siRNAObj:
 
     def hasCCCseq(self):
         Value = False
-        if "ccc" in self.sequence:
-            Value = True
+        for motif in self.runContext().motifDict["hasCCC"]:
+            if motif in self.sequence:
+                Value = True
         self.hasCCC = Value
 
     def hasGGGseq(self):
         Value = False
-        if "ggg" in self.sequence:
-            Value = True
+        for motif in self.runContext().motifDict["hasGGG"]:
+            if motif in self.sequence:
+                Value = True
         self.hasGGG = Value
 
     def lowGCinNinetoFourteen(self):
@@ -145,49 +179,39 @@ class siRNAObj:
             value = True
         self.lowGCNineFourteen = value
 
+    # Structure properties are lookups into the parent mRNA's accessibility index (see accessibilityIndex.py)
     def fivePrimeEndOnLoosemRNA(self):
-        value = True
-        parentStruct = self.parentMRNA.struct
-        localStruct = parentStruct[self.fivePrimeSpot - 3 : self.fivePrimeSpot]
-        if "(" in localStruct or ")" in localStruct:
-            value = False
-
-        self.fivePrimeLoosemRNA = value
+        index = self.parentMRNA.accessibilityIndex
+        self.fivePrimeLoosemRNA = bool(index.fivePrimeLoose(self.fivePrimeSpot))
 
     def threePrimeEndOnLoosemRNA(self):
-        value = True
-        parentStruct = self.parentMRNA.struct
-        localStruct = parentStruct[self.threePrimeSpot - 1 : self.threePrimeSpot + 2]
-        if "(" in localStruct or ")" in localStruct:
-            value = False
-
-        self.threePrimeLoosemRNA = value
+        index = self.parentMRNA.accessibilityIndex
+        self.threePrimeLoosemRNA = bool(index.threePrimeLoose(self.threePrimeSpot))
 
-    # Check to make sure this works
     def withinLooseMRNARegion(self):
-        value = True
-        parentStruct = self.parentMRNA.struct
-        localStruct = parentStruct[self.threePrimeSpot - 1 : self.fivePrimeSpot]
-        lengthOfStruct = len(localStruct)
-        pairedCount = 0
-        for char in localStruct:
-            if char == "(" or char == ")":
-                pairedCount += 1
-        if pairedCount / lengthOfStruct > 0.5:
-            value = False
-        self.loosemRNARegion = value
+        index = self.parentMRNA.accessibilityIndex
+        self.loosemRNARegion = bool(
+            index.looseRegion(self.threePrimeSpot, self.fivePrimeSpot)
+        )
+
+    # 0-1, how likely the bases the siRNA binds are to be unpaired
+    def targetAccessibility(self):
+        index = self.parentMRNA.accessibilityIndex
+        self.accessibility = float(
+            index.meanUnpaired(self.threePrimeSpot, self.fivePrimeSpot)
+        )
 
     def withinMRNARange(self):
         value = True
         if (
             self.fivePrimeSpot
             < self.parentMRNA.startCodonPos
-            + settings.sequenceOpt["howFarFromStartCodonInputSearch"]
+            + self.runContext().sequenceOpt["howFarFromStartCodonInputSearch"]
         ):
             value = False
         if self.threePrimeSpot > (
             self.parentMRNA.stopCodonPos
-            - settings.sequenceOpt["howFarFromStopCodonInputSearch"]
+            - self.runContext().sequenceOpt["howFarFromStopCodonInputSearch"]
         ):
             value = False
         self.withinmRNARange = value
@@ -272,15 +296,17 @@ class siRNAObj:
     # check immune Motif
     def immuneMotif(self):
         Value = False
-        if "guccuucaa" in self.sequence or "ugugu" in self.sequence:
-            Value = True
+        for motif in self.runContext().motifDict["hasImmuneMotif"]:
+            if motif in self.sequence:
+                Value = True
         self.hasImmuneMotif = Value
 
     # check cyto motif
     def cytoMotif(self):
         Value = False
-        if "uggc" in self.sequence:
-            Value = True
+        for motif in self.runContext().motifDict["hasCytoMotif"]:
+            if motif in self.sequence:
+                Value = True
         self.hasCytoMotif = Value
 
     # sets GC percentage
@@ -292,6 +318,9 @@ class siRNAObj:
         self.GCPer = round(GCCount / self.length, 2)
 
     def basePairs(self):
+        if self.struct is None:
+            # count already given by the folding server
+            return
         # counts base pairs based on parenthesis
         pairCount = 0
         for char in self.struct:
@@ -0,0 +1,88 @@
+"""
+STARTUP BUDGET FILE
+Checks that the GUI still opens fast: importing GUI.py must stay within a time budget, and must not import the modules
+that are only needed once a run or a PDF is asked for (numpy and the pipeline, reportlab, markdown, ViennaRNA).
+
+Usage (from the folder holding Main_Files):
+    python Main_Files/startupBudget.py [--budget-ms MS] [--runs N]
+
+Each run imports GUI.py in a fresh interpreter with python -X importtime, the fastest run is held to the budget.
+Exits with 1 and lists what went over when the budget is broken.
+
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+MODULE = "Main_Files.GUI"
+# Imported on first use instead of at startup (see the imports of GUI.py)
+DEFERRED_MODULES = (
+    "numpy",
+    "reportlab",
+    "markdown",
+    "RNA",
+    "Main_Files.processing",
+    "Main_Files.pipeline",
+    "Main_Files.PDFresults",
+)
+
+
+def importTimes(module):
+    """
+    Imports module in a fresh interpreter, returns module name -> cumulative import time in microseconds.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    times = {}
+    # Lines look like "import time:   self [us] | cumulative | imported package"
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            times[fields[2].strip()] = int(fields[1])
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Check that the GUI imports within its startup budget."
+    )
+    parser.add_argument("--budget-ms", type=float, default=150.0)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    runs = [importTimes(MODULE) for _ in range(max(args.runs, 1))]
+    fastest = min(runs, key=lambda times: times[MODULE])
+    problems = []
+
+    importMs = fastest[MODULE] / 1000
+    if importMs > args.budget_ms:
+        slowest = sorted(fastest.items(), key=lambda item: item[1], reverse=True)[1:6]
+        problems.append(
+            f"{MODULE} took {importMs:.0f} ms, over the {args.budget_ms:.0f} ms budget. Slowest imports: "
+            + ", ".join(f"{name} {time / 1000:.0f} ms" for name, time in slowest)
+        )
+
+    for module in DEFERRED_MODULES:
+        if module in fastest:
+            problems.append(f"{module} is imported at startup, it should wait until first use")
+
+    print(f"{MODULE} imported in {importMs:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    for problem in problems:
+        print("OVER BUDGET: " + problem, file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
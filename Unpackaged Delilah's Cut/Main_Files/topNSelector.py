@@ -0,0 +1,110 @@
+"""
+File contains the top N selector used instead of sorting every scored siRNA (see exclusion_and_scoring.topNRNAs)
+Scored candidate tables are fed in one after another and only the best N candidates seen so far are kept, in a heap whose
+root is the worst of them, so memory stays bounded by N however many candidates there are.
+Candidates that can't beat the root are dropped a whole table at a time, before anything touches the heap.
+
+Ties are broken the same way every run: higher score first, then the lower start position on the mRNA, then the shorter siRNA.
+
+"""
+
+import heapq
+import numpy as np
+
+
+class TopNSelector:
+    def __init__(self, n):
+        self.n = max(0, int(n))
+        # (rank key, insertion number, table, row), heap[0] is the worst candidate kept
+        self.heap = []
+        self.added = 0
+        # Rows held by the tables the heap points into, compacted once it grows well past n
+        self.heldRows = 0
+        # Every candidate offered, kept or not, reported as the number of non excluded siRNAs
+        self.total = 0
+
+    @staticmethod
+    def rankKey(score, threePrimeSpot, length):
+        # Larger is better
+        return (score, -threePrimeSpot, -length)
+
+    def addTable(self, table):
+        self.total += len(table)
+        if self.n == 0 or len(table) == 0:
+            return
+
+        scores = table.score
+        positions = table.threePrimeSpot
+        lengths = table.lengths
+        candidates = np.arange(len(table))
+
+        # Once the heap is full, only candidates ranking above its root can get in
+        if len(self.heap) == self.n:
+            worstScore, worstPosition, worstLength = self.heap[0][0]
+            worstPosition, worstLength = -worstPosition, -worstLength
+            beatsWorst = (scores > worstScore) | (
+                (scores == worstScore)
+                & (
+                    (positions < worstPosition)
+                    | ((positions == worstPosition) & (lengths < worstLength))
+                )
+            )
+            candidates = np.flatnonzero(beatsWorst)
+
+        # Partial selection, nothing scoring below this table's n-th best score can make it
+        if len(candidates) > self.n:
+            cutoffIndex = len(candidates) - self.n
+            cutoff = np.partition(scores[candidates], cutoffIndex)[cutoffIndex]
+            candidates = candidates[scores[candidates] >= cutoff]
+        if len(candidates) == 0:
+            return
+
+        order = np.lexsort(
+            (lengths[candidates], positions[candidates], -scores[candidates])
+        )
+        kept = table.subset(candidates[order][: self.n])
+        self.heldRows += len(kept)
+
+        # Best first, so once one candidate can't get in none of the rest can either
+        for row, key in enumerate(
+            zip(kept.score.tolist(), kept.threePrimeSpot.tolist(), kept.lengths.tolist())
+        ):
+            entry = (self.rankKey(*key), self.added, kept, row)
+            self.added += 1
+            if len(self.heap) < self.n:
+                heapq.heappush(self.heap, entry)
+            elif entry[0] > self.heap[0][0]:
+                heapq.heapreplace(self.heap, entry)
+            else:
+                break
+
+        if self.heldRows > 4 * self.n:
+            self.compact()
+
+    def compact(self):
+        # Cuts every table down to the rows still in the heap, so evicted rows are freed
+        survivors = {}
+        for _, _, table, row in self.heap:
+            survivors.setdefault(id(table), (table, []))[1].append(row)
+
+        newRows = {}
+        for table, rows in survivors.values():
+            smaller = table.subset(sorted(rows))
+            for newRow, oldRow in enumerate(sorted(rows)):
+                newRows[(id(table), oldRow)] = (smaller, newRow)
+
+        self.heap = [
+            (key, added) + newRows[(id(table), row)]
+            for key, added, table, row in self.heap
+        ]
+        heapq.heapify(self.heap)
+        self.heldRows = len(self.heap)
+
+    def best(self):
+        """
+        Returns the (table, row) of every candidate kept, best first.
+        """
+        return [(table, row) for _, _, table, row in sorted(self.heap, reverse=True)]
+
+    def rnaObjs(self):
+        return [table.getRNAObj(row) for table, row in self.best()]
@@ -0,0 +1,295 @@
+"""
+File contains the weight sensitivity analysis, how much the top N siRNAs of a run depend on the exact scoreVal weights
+The default weights in settings.py have not been optimized, so a run can also rank its non excluded siRNAs again under
+thousands of perturbed weight vectors (see sampledWeights and gridWeights) and report how often each siRNA still makes the
+top N. Turned on with pipelineOpt["sensitivityMode"] (see settings.py).
+
+A score only depends on which scoring rules an siRNA matches, and the non excluded siRNAs share a handful of such
+patterns, so every weight vector is applied to every pattern in one matrix product instead of running the pipeline once
+per vector. Ties are broken as in TopNSelector: the lower start position on the mRNA, then the shorter siRNA.
+
+"""
+
+import itertools
+
+import numpy as np
+
+from Main_Files.exclusion_and_scoring import compileRules
+
+# Most pattern scores held at once, about 32 MB
+CHUNK_SCORES = 1 << 22
+
+
+def sampledWeights(baseWeights, samples, spread, seed=0):
+    """
+    samples weight vectors, each weight scaled by its own random factor between 1 - spread and 1 + spread.
+    The first vector is baseWeights unchanged, so the run's own ranking is always among them.
+    """
+    if not 0 <= spread < 1:
+        raise ValueError("sensitivitySpread must be at least 0 and below 1")
+    baseWeights = np.asarray(baseWeights, dtype=float)
+    rng = np.random.default_rng(seed)
+    factors = rng.uniform(1 - spread, 1 + spread, size=(max(samples, 1) - 1, len(baseWeights)))
+    return np.vstack([baseWeights, factors * baseWeights])
+
+
+def gridWeights(baseWeights, factors, maxVectors):
+    """
+    Every combination of each weight scaled by one of factors, len(factors) ** weights vectors.
+    """
+    baseWeights = np.asarray(baseWeights, dtype=float)
+    vectorCount = len(factors) ** len(baseWeights)
+    if vectorCount > maxVectors:
+        raise ValueError(
+            f"A grid of {len(factors)} factors over {len(baseWeights)} scoring weights is {vectorCount} weight vectors, "
+            f"over sensitivityMaxVectors ({maxVectors}), use fewer factors or the sampled mode"
+        )
+    grid = np.array(list(itertools.product(factors, repeat=len(baseWeights))), dtype=float)
+    return grid.reshape(vectorCount, len(baseWeights)) * baseWeights
+
+
+def topNCounts(scores, patternOf, n):
+    """
+    scores is weight vectors x patterns, patternOf the pattern of each candidate, candidates in tie break order.
+    Returns how many of the weight vectors rank each candidate in the top n.
+    """
+    candidateCount = len(patternOf)
+    vectorCount, patternCount = scores.shape
+    if n >= candidateCount:
+        return np.full(candidateCount, vectorCount, dtype=np.int64)
+    if n == 0:
+        return np.zeros(candidateCount, dtype=np.int64)
+
+    # Score of the n-th best candidate under each vector
+    # Every pattern holds at least one candidate, so only the n best patterns of a vector can hold its n best candidates
+    patternSizes = np.bincount(patternOf, minlength=patternCount)
+    best = min(n, patternCount)
+    if best < patternCount:
+        bestPatterns = np.argpartition(-scores, best - 1, axis=1)[:, :best]
+    else:
+        bestPatterns = np.broadcast_to(np.arange(patternCount), scores.shape)
+    bestScores = np.take_along_axis(scores, bestPatterns, axis=1)
+    order = np.argsort(-bestScores, axis=1, kind="stable")
+    bestPatterns = np.take_along_axis(bestPatterns, order, axis=1)
+    reached = np.cumsum(patternSizes[bestPatterns], axis=1) >= n
+    cutoffs = np.take_along_axis(bestScores, order, axis=1)[
+        np.arange(vectorCount), reached.argmax(axis=1)
+    ][:, None]
+
+    above = scores > cutoffs
+    counts = above.sum(axis=0)[patternOf]
+
+    # The places left go to the candidates scoring exactly the cutoff, in tie break order
+    atCutoff = scores == cutoffs
+    placesLeft = n - above @ patternSizes
+    single = atCutoff.sum(axis=1) == 1
+
+    # Usually a single pattern scores the cutoff and its first candidates get in, a range of the candidates grouped by
+    # pattern, so each vector only marks where its range starts and stops
+    byPattern = np.argsort(patternOf, kind="stable")
+    firstOfPattern = np.concatenate(([0], np.cumsum(patternSizes)[:-1]))
+    firsts = firstOfPattern[atCutoff[single].argmax(axis=1)]
+    steps = np.zeros(candidateCount + 1, dtype=np.int64)
+    np.add.at(steps, firsts, 1)
+    np.add.at(steps, firsts + placesLeft[single], -1)
+    counts[byPattern] += np.cumsum(steps[:-1])
+
+    # Otherwise vectors with the same tied patterns and places left pick the same candidates, so each such group is done once
+    if not single.all():
+        tied = atCutoff[~single]
+        places = placesLeft[~single]
+        # Each vector's tied patterns as packed bits followed by its places left, compared as raw bytes
+        keys = np.hstack(
+            [np.packbits(tied, axis=1), places.astype(np.int64)[:, None].view(np.uint8)]
+        )
+        keys = np.ascontiguousarray(keys).view(np.dtype((np.void, keys.shape[1])))
+        _, firstVectors, groupSizes = np.unique(
+            keys.reshape(-1), return_index=True, return_counts=True
+        )
+        for vector, groupSize in zip(firstVectors.tolist(), groupSizes.tolist()):
+            picked = np.flatnonzero(tied[vector, patternOf])[: places[vector]]
+            counts[picked] += groupSize
+    return counts
+
+
+class WeightSensitivity:
+    def __init__(self, settingsList, n, pipelineOpt):
+        """
+        Collects the non excluded siRNAs of a run (see SiRNAPipeline.run), the weight vectors are made up front so
+        a grid too large to evaluate is refused before anything is folded.
+        """
+        self.rules = compileRules(settingsList)
+        self.n = max(0, int(n))
+        self.mode = pipelineOpt["sensitivityMode"]
+        if self.mode == "sampled":
+            self.weightVectors = sampledWeights(
+                self.rules.weights,
+                pipelineOpt["sensitivitySamples"],
+                pipelineOpt["sensitivitySpread"],
+                pipelineOpt["sensitivitySeed"],
+            )
+            self.description = (
+                f"each scoring weight scaled by a random factor between "
+                f"{1 - pipelineOpt['sensitivitySpread']:g} and {1 + pipelineOpt['sensitivitySpread']:g}"
+            )
+        elif self.mode == "grid":
+            factors = pipelineOpt["sensitivityGridFactors"]
+            self.weightVectors = gridWeights(
+                self.rules.weights, factors, pipelineOpt["sensitivityMaxVectors"]
+            )
+            self.description = "every combination of the scoring weights scaled by " + ", ".join(
+                f"{factor:g}" for factor in factors
+            )
+        else:
+            raise ValueError(f"Unknown sensitivityMode: {self.mode}")
+
+        self.mRNA = None
+        # Per table fed in: which scoring rules each row matches, and where the row is on the mRNA
+        self.matched = []
+        self.starts = []
+        self.threePrimeSpot = []
+        self.lengths = []
+
+    def addTable(self, table):
+        if len(table) == 0:
+            return
+        self.mRNA = table.parentMRNA
+        self.matched.append(self.rules.matchedMatrix(table))
+        self.starts.append(table.starts)
+        self.threePrimeSpot.append(table.threePrimeSpot)
+        self.lengths.append(table.lengths)
+
+    def analyze(self):
+        """
+        Ranks the collected siRNAs under every weight vector, returns a SensitivityResult.
+        """
+        ruleCount = len(self.rules.weights)
+        if not self.matched:
+            empty = np.zeros(0, dtype=np.int64)
+            return SensitivityResult(self, None, empty, empty, empty, empty)
+
+        threePrimeSpot = np.concatenate(self.threePrimeSpot)
+        lengths = np.concatenate(self.lengths)
+        order = np.lexsort((lengths, threePrimeSpot))
+        matched = np.concatenate(self.matched)[order]
+
+        if ruleCount == 0:
+            patterns = np.zeros((1, 0))
+            patternOf = np.zeros(len(matched), dtype=np.int64)
+        else:
+            patterns, patternOf = np.unique(matched, axis=0, return_inverse=True)
+        patterns = patterns.astype(float)
+        patternOf = patternOf.reshape(-1)
+
+        # Vectors go through a chunk at a time, so the vectors x patterns scores stay within CHUNK_SCORES values
+        counts = np.zeros(len(matched), dtype=np.int64)
+        chunkSize = max(1, CHUNK_SCORES // len(patterns))
+        for first in range(0, len(self.weightVectors), chunkSize):
+            scores = self.weightVectors[first : first + chunkSize] @ patterns.T
+            counts += topNCounts(scores, patternOf, self.n)
+        return SensitivityResult(
+            self,
+            self.mRNA,
+            np.concatenate(self.starts)[order],
+            threePrimeSpot[order],
+            lengths[order],
+            counts,
+        )
+
+
+class SensitivityResult:
+    def __init__(self, sensitivity, mRNA, starts, threePrimeSpot, lengths, topNCounts):
+        self.mode = sensitivity.mode
+        self.description = sensitivity.description
+        self.n = sensitivity.n
+        self.vectorCount = len(sensitivity.weightVectors)
+        self.mRNA = mRNA
+        # Every non excluded siRNA in tie break order, and how many weight vectors put it in the top n
+        self.starts = starts
+        self.threePrimeSpot = threePrimeSpot
+        self.lengths = lengths
+        self.topNCounts = topNCounts
+        self.rowOf = {
+            key: row for row, key in enumerate(zip(threePrimeSpot.tolist(), lengths.tolist()))
+        }
+
+    def topNShare(self, threePrimeSpot, length):
+        # Share of the weight vectors ranking the siRNA at threePrimeSpot with length in the top n
+        row = self.rowOf.get((threePrimeSpot, length))
+        if row is None:
+            return 0.0
+        return self.topNCounts[row].item() / self.vectorCount
+
+    def sequence(self, row):
+        start = self.starts[row]
+        return self.mRNA.reverseCompSeq[start : start + self.lengths[row]]
+
+    def mostStable(self):
+        # Rows that made the top n under at least one vector, most often first
+        rows = np.flatnonzero(self.topNCounts)
+        return rows[np.argsort(-self.topNCounts[rows], kind="stable")]
+
+    def asDict(self):
+        return {
+            "mode": self.mode,
+            "weightVectors": self.vectorCount,
+            "topN": self.n,
+            "siRNAs": [
+                {
+                    "sequence": self.sequence(row),
+                    "length": self.lengths[row].item(),
+                    "startPosition": self.threePrimeSpot[row].item(),
+                    "topNShare": self.topNCounts[row].item() / self.vectorCount,
+                }
+                for row in self.mostStable().tolist()
+            ],
+        }
+
+
+def generateSensitivityReport(result, topRNAs):
+    """
+    Report of result (see WeightSensitivity.analyze) for the run's reported siRNAs, shown after their reports.
+    """
+    report = []
+    report.append("________________________________")
+    report.append("________________________________")
+    report.append("WEIGHT SENSITIVITY OF THE TOP siRNAs")
+    report.append("________________________________")
+    report.append(f"Weight vectors evaluated: {result.vectorCount} ({result.description})")
+    report.append(f"Non excluded siRNAs ranked under each: {len(result.topNCounts)}")
+    report.append(
+        f"siRNAs in the top {result.n} under at least one weight vector: {len(result.mostStable())}"
+    )
+    if len(topRNAs) == 0:
+        report.append("________________________________")
+        return report
+
+    shares = [result.topNShare(RNA.threePrimeSpot, RNA.length) for RNA in topRNAs]
+    report.append(
+        f"Average share of the reported siRNAs staying in the top {result.n}: {100 * sum(shares) / len(shares):.1f}%"
+    )
+    report.append("________________________________")
+    report.append(f"Share of weight vectors ranking each reported siRNA in the top {result.n}:")
+    for RNA, share in zip(topRNAs, shares):
+        report.append(
+            f"5'-{RNA.sequence}-3' (start position {RNA.threePrimeSpot}): {100 * share:.1f}%"
+        )
+
+    reported = {(RNA.threePrimeSpot, RNA.length) for RNA in topRNAs}
+    others = [
+        row
+        for row in result.mostStable().tolist()
+        if (result.threePrimeSpot[row].item(), result.lengths[row].item()) not in reported
+    ][: len(topRNAs)]
+    if others:
+        report.append("________________________________")
+        report.append("siRNAs not reported that reach the top under other weights:")
+        for row in others:
+            report.append(
+                f"5'-{result.sequence(row)}-3' (start position {result.threePrimeSpot[row]}): "
+                f"{100 * result.topNCounts[row] / result.vectorCount:.1f}%"
+            )
+    report.append("________________________________")
+    report.append("")
+    return report
+
@@ -0,0 +1,30 @@
+"""
+File sets up the tests, run with python -m pytest from Unpackaged Delilah's Cut
+Main_Files is imported as a package from here, the same way main.py and the GUI import it. The on disk fold cache is
+turned off, so tests neither read folds from nor leave folds in Fold_Cache.
+
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Main_Files.settings as settings
+from Main_Files.processing import getFoldingServers
+
+settings.foldingOpt["cacheMaxEntries"] = 0
+
+
+def randomMRNA(length, seed):
+    rng = random.Random(seed)
+    return "aug" + "".join(rng.choice("acgu") for _ in range(length - 3))
+
+
+@pytest.fixture(autouse=True, scope="session")
+def foldingServers():
+    yield getFoldingServers()
+    getFoldingServers().close()
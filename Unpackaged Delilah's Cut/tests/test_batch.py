@@ -0,0 +1,78 @@
+import json
+import os
+
+import pytest
+
+from Main_Files.batch import CHECKPOINT_NAME, main, readCheckpoint
+from Main_Files.processing import getFoldingServers
+
+from conftest import randomMRNA
+
+
+@pytest.fixture(autouse=True)
+def noParentServers():
+    # Batch workers are forked, they mustn't inherit servers this process has running
+    getFoldingServers().close()
+
+
+def writeFasta(path, records):
+    with open(path, "w") as file:
+        for name, sequence in records:
+            file.write(f">{name}\n{sequence}\n")
+
+
+def runMain(inputPath, resultsDir, *extra):
+    return main([str(inputPath), "--out", str(resultsDir), "--workers", "1", "--top", "5", *extra])
+
+
+def checkpointLines(resultsDir):
+    with open(os.path.join(resultsDir, CHECKPOINT_NAME), "r") as file:
+        return file.read().splitlines()
+
+
+def test_rerun_resumes_from_the_checkpoint(tmp_path, capsys):
+    inputPath = tmp_path / "panel.fasta"
+    writeFasta(inputPath, [("first", randomMRNA(300, 1)), ("second", randomMRNA(300, 2))])
+    assert runMain(inputPath, tmp_path / "results") == 0
+    assert {name: record["status"] for name, record in readCheckpoint(tmp_path / "results").items()} == {
+        "first": "done",
+        "second": "done",
+    }
+
+    assert runMain(inputPath, tmp_path / "results") == 0
+    assert "0 transcripts to design, 2 already in the checkpoint" in capsys.readouterr().err
+    assert len(checkpointLines(tmp_path / "results")) == 2
+
+
+def test_failed_transcript_fails_every_run_until_retried(tmp_path, capsys):
+    inputPath = tmp_path / "panel.fasta"
+    writeFasta(inputPath, [("good", randomMRNA(300, 3)), ("empty", "")])
+    assert runMain(inputPath, tmp_path / "results") == 1
+
+    # Nothing is designed this time, the earlier failure still sets the exit status
+    capsys.readouterr()
+    assert runMain(inputPath, tmp_path / "results") == 1
+    assert "Failed (run again with --retry-failed): empty" in capsys.readouterr().err
+
+    writeFasta(inputPath, [("good", randomMRNA(300, 3)), ("empty", randomMRNA(300, 4))])
+    assert runMain(inputPath, tmp_path / "results", "--retry-failed") == 0
+    assert readCheckpoint(tmp_path / "results")["empty"]["status"] == "done"
+
+
+def test_partial_checkpoint_line_runs_its_transcript_again(tmp_path):
+    inputPath = tmp_path / "panel.fasta"
+    writeFasta(inputPath, [("first", randomMRNA(300, 5)), ("second", randomMRNA(300, 6))])
+    resultsDir = tmp_path / "results"
+    assert runMain(inputPath, resultsDir) == 0
+
+    # As if the batch was stopped while writing the record of second
+    lines = checkpointLines(resultsDir)
+    keptLine, cutLine = sorted(lines, key=lambda line: json.loads(line)["name"] != "first")
+    with open(os.path.join(resultsDir, CHECKPOINT_NAME), "w") as file:
+        file.write(keptLine + "\n" + cutLine[: len(cutLine) // 2])
+
+    assert runMain(inputPath, resultsDir) == 0
+    lines = checkpointLines(resultsDir)
+    assert len(lines) == 3
+    assert json.loads(lines[2])["name"] == "second"
+    assert set(readCheckpoint(resultsDir)) == {"first", "second"}
@@ -0,0 +1,58 @@
+import Main_Files.settings as settings
+from Main_Files.designSession import DesignSession, SessionPipeline
+from Main_Files.pipeline import runDesign
+from Main_Files.runContext import RunContext
+
+from conftest import randomMRNA
+
+
+def pastedContext(sequence):
+    context = RunContext.fromSettings()
+    context.basicNeedsDict.update({"textFile(T)/CopyPasted(F)": False, "cDNA(T)/mRNA(F)": False, "saveSettings": False})
+    context.sequence_dict["sequence"] = sequence
+    for rule in context.exclusionAndScoringDict:
+        rule["exclusionary"] = False
+    return context
+
+
+def reportsWithoutDate(reports):
+    return [[line for line in report if not line.startswith("Date")] for report in reports]
+
+
+def test_long_transcript_streams_through_the_session(monkeypatch):
+    # 3000 bases count as long here, so the run streams in blocks of 1000 windows
+    monkeypatch.setitem(settings.pipelineOpt, "streamAboveLength", 2000)
+    monkeypatch.setitem(settings.pipelineOpt, "blockSize", 1000)
+    monkeypatch.setitem(settings.foldingOpt, "mRNAFolding", "local")
+    sequence = randomMRNA(3000, 5)
+
+    blockSizes = []
+    foldedRows = []
+    windowBlocks = SessionPipeline.windowBlocks
+    foldBlock = SessionPipeline.foldBlock
+
+    def recordedWindowBlocks(pipeline):
+        for block in windowBlocks(pipeline):
+            blockSizes.append(len(block))
+            yield block
+
+    def recordedFoldBlock(pipeline, block):
+        foldedRows.append(int((~pipeline.session.prepared.table.isFolded[pipeline.session.rowsOf(block)]).sum()))
+        foldBlock(pipeline, block)
+
+    monkeypatch.setattr(SessionPipeline, "windowBlocks", recordedWindowBlocks)
+    monkeypatch.setattr(SessionPipeline, "foldBlock", recordedFoldBlock)
+    session = DesignSession()
+    first = session.run(pastedContext(sequence))
+
+    windowCount = len(session.prepared.table)
+    assert max(blockSizes) <= 1000 and sum(blockSizes) == windowCount
+    assert sum(foldedRows) > 0
+    assert session.prepared.table.columns == {}
+    assert reportsWithoutDate(first[1]) == reportsWithoutDate(runDesign(pastedContext(sequence))[1])
+
+    # A rerun folds nothing new
+    foldedRows.clear()
+    again = session.run(pastedContext(sequence))
+    assert sum(foldedRows) == 0
+    assert reportsWithoutDate(again[1]) == reportsWithoutDate(first[1])
@@ -0,0 +1,157 @@
+import threading
+import time
+
+import pytest
+
+import Main_Files.settings as settings
+from Main_Files.designApi import design
+from Main_Files.processing import FoldingServer, FoldingServerPool
+
+from conftest import randomMRNA
+
+
+def siRNAKeys(result):
+    return [(RNA.sequence, RNA.threePrimeSpot, RNA.score, RNA.mfe) for RNA in result.siRNAs]
+
+
+def runThreads(targets, timeout=120):
+    threads = [threading.Thread(target=target) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout)
+    assert not any(thread.is_alive() for thread in threads), "a design never finished"
+
+
+def foldEveryWindow(monkeypatch):
+    # Every siRNA window goes to the folding servers, and the mRNA itself folds quickly
+    monkeypatch.setitem(settings.foldingOpt, "hairpinScreen", "off")
+    monkeypatch.setitem(settings.foldingOpt, "mRNAFolding", "local")
+    for rule in settings.exclusionAndScoringDict:
+        monkeypatch.setitem(rule, "exclusionary", False)
+
+
+def test_concurrent_designs_fold_side_by_side(monkeypatch):
+    foldEveryWindow(monkeypatch)
+    monkeypatch.setitem(settings.foldingOpt, "servers", 2)
+    sequences = [randomMRNA(2000, seed) for seed in (1, 2)]
+    alone = [siRNAKeys(design(sequence, topN=15)) for sequence in sequences]
+
+    # Which server folded each round of which thread, and when
+    rounds = []
+    foldRound = FoldingServer.foldRound
+
+    def timedRound(server, roundSequences):
+        start = time.monotonic()
+        chunks = foldRound(server, roundSequences)
+        rounds.append((threading.current_thread().name, id(server), start, time.monotonic()))
+        return chunks
+
+    monkeypatch.setattr(FoldingServer, "foldRound", timedRound)
+    together = {}
+
+    def designFor(index):
+        return lambda: together.__setitem__(index, siRNAKeys(design(sequences[index], topN=15)))
+
+    runThreads([designFor(0), designFor(1)])
+    assert [together[0], together[1]] == alone
+
+    threadNames = {name for name, _, _, _ in rounds}
+    assert len(threadNames) == 2
+    assert len({server for _, server, _, _ in rounds}) == 2
+    overlapping = any(
+        nameA != nameB and startA < endB and startB < endA
+        for nameA, _, startA, endA in rounds
+        for nameB, _, startB, endB in rounds
+    )
+    assert overlapping, "the two designs never folded at the same time"
+
+
+def test_batches_interleave_on_a_single_server(monkeypatch):
+    monkeypatch.setitem(settings.foldingOpt, "servers", 1)
+    monkeypatch.setitem(settings.foldingOpt, "chunkSize", 16)
+    monkeypatch.setitem(settings.foldingOpt, "workers", 1)
+    pool = FoldingServerPool()
+    try:
+        sequencesA = [randomMRNA(21, seed)[:21] for seed in range(200)]
+        sequencesB = [randomMRNA(21, seed)[:21] for seed in range(200, 400)]
+        batchA = pool.foldBatch(sequencesA)
+        batchB = pool.foldBatch(sequencesB)
+        # Alternating between two unfinished batches would deadlock if a round kept its server past its yield
+        foldsA, foldsB = [], []
+        for chunkA, chunkB in zip(batchA, batchB):
+            foldsA.extend(chunkA)
+            foldsB.extend(chunkB)
+        foldsA.extend(fold for chunk in batchA for fold in chunk)
+        foldsB.extend(fold for chunk in batchB for fold in chunk)
+        assert foldsA == [fold for chunk in pool.foldBatch(sequencesA) for fold in chunk]
+        assert len(foldsB) == len(sequencesB)
+    finally:
+        pool.close()
+
+
+def test_abandoned_batch_holds_no_server(monkeypatch):
+    monkeypatch.setitem(settings.foldingOpt, "servers", 1)
+    pool = FoldingServerPool()
+    try:
+        abandoned = pool.foldBatch([randomMRNA(21, seed)[:21] for seed in range(5000)])
+        next(abandoned)
+        folded = []
+        runThreads([lambda: folded.append(pool.foldMRNA(randomMRNA(200, 7)))], timeout=30)
+        assert folded and folded[0][0]
+    finally:
+        pool.close()
+
+
+def test_cancel_stops_only_its_own_batch(monkeypatch):
+    monkeypatch.setitem(settings.foldingOpt, "servers", 2)
+    monkeypatch.setitem(settings.foldingOpt, "chunkSize", 16)
+    monkeypatch.setitem(settings.foldingOpt, "workers", 1)
+    pool = FoldingServerPool()
+    try:
+        cancelledA, cancelledB = threading.Event(), threading.Event()
+        sequencesB = [randomMRNA(21, seed)[:21] for seed in range(200, 400)]
+        batchA = pool.foldBatch([randomMRNA(21, seed)[:21] for seed in range(2000)], cancelledA)
+        batchB = pool.foldBatch(sequencesB, cancelledB)
+        next(batchA)
+        foldsB = list(next(batchB))
+        cancelledA.set()
+        pool.cancel(cancelledA, grace=0.2)
+        # A ends with the round it had already read, B folds on to its end
+        with pytest.raises(RuntimeError):
+            list(batchA)
+        foldsB.extend(fold for chunk in batchB for fold in chunk)
+        assert foldsB == [fold for chunk in pool.foldBatch(sequencesB) for fold in chunk]
+    finally:
+        pool.close()
+
+
+def test_cancel_stops_a_server_that_keeps_folding(monkeypatch):
+    monkeypatch.setitem(settings.foldingOpt, "servers", 2)
+    pool = FoldingServerPool()
+    try:
+        cancelledA, cancelledB = threading.Event(), threading.Event()
+        errors = []
+
+        def foldLong():
+            try:
+                pool.foldMRNA(randomMRNA(5000, 3), cancelledA)
+            except RuntimeError as error:
+                errors.append(error)
+
+        thread = threading.Thread(target=foldLong)
+        thread.start()
+        while not pool.busy:
+            time.sleep(0.01)
+        assert pool.foldMRNA(randomMRNA(200, 7), cancelledB)[0]
+        otherServer = pool.idle[0]
+
+        cancelledA.set()
+        pool.cancel(cancelledA, grace=0.2)
+        thread.join(10)
+        assert not thread.is_alive() and errors
+        # Only the cancelled request's server was stopped
+        assert otherServer.isRunning()
+        assert pool.foldMRNA(randomMRNA(200, 8), cancelledB)[0]
+    finally:
+        pool.close()
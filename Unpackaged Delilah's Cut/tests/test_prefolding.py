@@ -0,0 +1,33 @@
+import threading
+import time
+
+import pytest
+
+from Main_Files.prefolding import SpeculativeFolder
+from Main_Files.runContext import RunCancelled, RunContext
+
+from conftest import randomMRNA
+
+
+def pastedContext(sequence):
+    context = RunContext.fromProfile()
+    context.basicNeedsDict.update({"textFile(T)/CopyPasted(F)": False, "cDNA(T)/mRNA(F)": False, "saveSettings": False})
+    context.sequence_dict["sequence"] = sequence
+    return context
+
+
+def test_cancelled_run_stops_waiting_on_its_job():
+    # Folding 3000 bases as a whole takes far longer than the run waits before it is cancelled
+    sequence = randomMRNA(3000, 11)
+    folder = SpeculativeFolder()
+    folder.start(pastedContext(sequence))
+    job = folder.job
+
+    context = pastedContext(sequence)
+    threading.Timer(0.3, context.cancelled.set).start()
+    started = time.monotonic()
+    with pytest.raises(RunCancelled):
+        folder.take(context)
+    assert time.monotonic() - started < 3
+    assert job.cancelled.is_set() and folder.job is None
+    assert job.done.wait(10)